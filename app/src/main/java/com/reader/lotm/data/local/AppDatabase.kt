@@ -4,16 +4,29 @@ import android.content.Context
 import androidx.room.Database
 import androidx.room.Room
 import androidx.room.RoomDatabase
+import androidx.sqlite.db.SupportSQLiteDatabase
 
 @Database(
     entities = [ChapterEntity::class],
-    version = 2,
+    version = 3,
     exportSchema = true
 )
 abstract class AppDatabase : RoomDatabase() {
     abstract fun chapterDao(): ChapterDao
 
     companion object {
+        // Room cannot declare expression indexes on an entity, so this one is
+        // created after Room has validated the schema. ChapterDao orders and
+        // navigates by the same COALESCE(order_index, id) expression.
+        private const val CREATE_READING_ORDER_INDEX =
+            "CREATE INDEX IF NOT EXISTS index_chapters_reading_order ON chapters(COALESCE(order_index, id))"
+
+        private val readingOrderIndex = object : RoomDatabase.Callback() {
+            override fun onOpen(db: SupportSQLiteDatabase) {
+                db.execSQL(CREATE_READING_ORDER_INDEX)
+            }
+        }
+
         @Volatile
         private var INSTANCE: AppDatabase? = null
 
@@ -26,6 +39,7 @@ abstract class AppDatabase : RoomDatabase() {
                 )
                     .createFromAsset("databases/lotm.db")
                     .fallbackToDestructiveMigration()
+                    .addCallback(readingOrderIndex)
                     .build()
                 INSTANCE = instance
                 instance
@@ -35,9 +35,11 @@ interface ChapterDao {
     @Query("DELETE FROM chapters")
     suspend fun deleteAllChapters()
 
-    @Query("SELECT MIN(id) FROM chapters WHERE COALESCE(order_index, id) > (SELECT COALESCE(order_index, id) FROM chapters WHERE id = :currentChapterId)")
+    // ORDER BY ... LIMIT 1 lets SQLite seek index_chapters_reading_order (created by
+    // AppDatabase on open); MIN(id)/MAX(id) made it walk the table in rowid order instead
+    @Query("SELECT id FROM chapters WHERE COALESCE(order_index, id) > (SELECT COALESCE(order_index, id) FROM chapters WHERE id = :currentChapterId) ORDER BY COALESCE(order_index, id) ASC LIMIT 1")
     suspend fun getNextChapterId(currentChapterId: Int): Int?
 
-    @Query("SELECT MAX(id) FROM chapters WHERE COALESCE(order_index, id) < (SELECT COALESCE(order_index, id) FROM chapters WHERE id = :currentChapterId)")
+    @Query("SELECT id FROM chapters WHERE COALESCE(order_index, id) < (SELECT COALESCE(order_index, id) FROM chapters WHERE id = :currentChapterId) ORDER BY COALESCE(order_index, id) DESC LIMIT 1")
     suspend fun getPreviousChapterId(currentChapterId: Int): Int?
 }
@@ -2,9 +2,13 @@ package com.reader.lotm.data.local
 
 import androidx.room.ColumnInfo
 import androidx.room.Entity
+import androidx.room.Index
 import androidx.room.PrimaryKey
 
-@Entity(tableName = "chapters")
+@Entity(
+    tableName = "chapters",
+    indices = [Index(value = ["order_index"])]
+)
 data class ChapterEntity(
     @PrimaryKey(autoGenerate = true)
     val id: Int = 0,
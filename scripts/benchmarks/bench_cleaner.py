@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Throughput of ContentCleaner.clean_text in MB/s: the precompiled
+cleaner vs the previous implementation (one re.sub per rule, patterns
+compiled on every call).
+
+Throughput is measured on the sample chapters' text as extracted, and on
+the same text with URLs and stray whitespace mixed in. Ad lines are only
+used for the correctness check: the previous cleaner removed everything
+after the first one, which made it look fast. It also collapsed every line
+break, so the paragraph breaks kept by each cleaner are reported.
+
+Usage:
+  python benchmarks/bench_cleaner.py
+  python benchmarks/bench_cleaner.py --repeat 8 --rounds 10
+
+"""
+
+import argparse
+import re
+import time
+
+import yaml
+
+from samples import SCRIPTS_DIR, sample_chapters
+from utils.cleaner import ContentCleaner
+
+
+def legacy_clean_text(text: str) -> str:
+    """ContentCleaner.clean_text before the rules were compiled into one pass"""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    ad_patterns = [
+        r'Реклама:.*?(?=\n|$)',
+        r'Объявление:.*?(?=\n|$)',
+        r'https?://[^\s]+',
+    ]
+    for pattern in ad_patterns:
+        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def raw_content(content: str, repeat: int, noise: bool = True, ads: bool = False) -> str:
+    """Chapter text as the parser hands it over, before cleaning"""
+    paragraphs = [p for p in content.split('\n\n') if p.strip()] * repeat
+    if not noise:
+        return '\n\n'.join(paragraphs)
+    parts = []
+    for idx, paragraph in enumerate(paragraphs):
+        if ads and idx % 20 == 5:
+            parts.append('Реклама: читайте на https://example.com/ad')
+        if idx % 25 == 11:
+            paragraph += ' (source: https://ranobes.top/chapters/1/)'
+        parts.append('  ' + paragraph.replace('. ', '.  ') + ' \t')
+    return '\n\n\n'.join(parts)
+
+
+def throughput(fn, texts, rounds: int) -> float:
+    """Best-of-rounds MB/s of fn over all texts"""
+    size = sum(len(t.encode('utf-8')) for t in texts)
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - start)
+    return size / best / 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark chapter text cleanup')
+    ap.add_argument('--config', default=str(SCRIPTS_DIR / 'config.yaml'))
+    ap.add_argument('--repeat', type=int, default=4, help='Repeat each sample chapter N times (default: 4)')
+    ap.add_argument('--rounds', type=int, default=5, help='Timing rounds, best is kept (default: 5)')
+    args = ap.parse_args()
+
+    with open(args.config, 'r') as f:
+        site_config = yaml.safe_load(f).get('ranobes.top', {})
+
+    chapters = sample_chapters()
+    cleaner = ContentCleaner(site_config)
+    for label, noise in (('extracted text', False), ('with URLs and extra whitespace', True)):
+        texts = [raw_content(chapter['content'], args.repeat, noise) for chapter in chapters]
+        size = sum(len(t.encode('utf-8')) for t in texts)
+        legacy = throughput(lambda batch: [legacy_clean_text(t) for t in batch], texts, args.rounds)
+        single = throughput(lambda batch: [cleaner.clean_text(t) for t in batch], texts, args.rounds)
+        many = throughput(lambda batch: list(cleaner.clean_many(batch)), texts, args.rounds)
+        print(f"{len(texts)} chapters {label}, {size / 1024:.0f} KiB")
+        print(f"  previous cleaner: {legacy:.1f} MB/s")
+        print(f"  clean_text: {single:.1f} MB/s ({single / legacy:.1f}x)")
+        print(f"  clean_many: {many:.1f} MB/s ({many / legacy:.1f}x)")
+
+    texts = [raw_content(chapter['content'], args.repeat, ads=True) for chapter in chapters]
+    expected = sum(len([p for p in t.split('\n\n') if p.strip() and 'Реклама:' not in p]) - 1 for t in texts)
+    legacy_breaks = sum(legacy_clean_text(t).count('\n\n') for t in texts)
+    cleaned = list(cleaner.clean_many(texts))
+    breaks = sum(t.count('\n\n') for t in cleaned)
+    leftovers = sum(('http' in t) + ('Реклама' in t) + ('  ' in t) + ('\n\n\n' in t) for t in cleaned)
+    print(f"Paragraph breaks kept with ad lines mixed in: {breaks}/{expected} "
+          f"(previous cleaner: {legacy_breaks}/{expected})")
+    if breaks != expected or leftovers:
+        print("❌ Cleaned text lost paragraphs or kept ads, URLs or extra whitespace")
+        raise SystemExit(1)
+    print("✓ Paragraphs kept, ads, URLs and extra whitespace removed")
+
+
+if __name__ == '__main__':
+    main()
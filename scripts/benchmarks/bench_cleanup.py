@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Regression check for RanobesParser cleanup cost over a long run.
+
+Calls _clean_and_extract on sample chapter content blocks --calls times and
+compares the mean time of the first and last windows of calls. Cleanup used
+to append the built-in removal selectors to the config list on every call,
+so each call was slower than the last; the per-call time must now stay flat.
+
+Usage:
+  python benchmarks/bench_cleanup.py
+  python benchmarks/bench_cleanup.py --calls 20000 --window 2000
+
+"""
+
+import argparse
+import copy
+import time
+
+import yaml
+from bs4 import BeautifulSoup
+
+from samples import SCRIPTS_DIR, load_pages
+from utils.parser import RanobesParser
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Check that per-call cleanup time stays constant')
+    ap.add_argument('--config', default=str(SCRIPTS_DIR / 'config.yaml'))
+    ap.add_argument('--calls', type=int, default=10000, help='Number of cleanup calls (default: 10000)')
+    ap.add_argument('--window', type=int, default=1000, help='Calls per timing window (default: 1000)')
+    ap.add_argument('--max-drift', type=float, default=1.5,
+                    help='Fail if the last window is this many times slower than the first (default: 1.5)')
+    args = ap.parse_args()
+
+    with open(args.config, 'r') as f:
+        site_config = yaml.safe_load(f).get('ranobes.top', {})
+
+    parser = RanobesParser(copy.deepcopy(site_config))
+    remove_elements = list(parser.selectors.get('remove_elements', []))
+    blocks = [BeautifulSoup(page, 'lxml').select_one('div.text-content') for page in load_pages()]
+
+    windows = []
+    start = time.perf_counter()
+    for call in range(args.calls):
+        parser._clean_and_extract(blocks[call % len(blocks)])
+        if (call + 1) % args.window == 0:
+            now = time.perf_counter()
+            windows.append((now - start) / args.window)
+            print(f"  calls {call + 2 - args.window:>6}-{call + 1:<6} {windows[-1] * 1000:.3f} ms/call")
+            start = time.perf_counter()
+
+    drift = windows[-1] / windows[0]
+    print(f"Last/first window: {drift:.2f}x")
+    if parser.selectors.get('remove_elements', []) != remove_elements:
+        print(f"❌ remove_elements changed from {len(remove_elements)} to "
+              f"{len(parser.selectors['remove_elements'])} selectors")
+        raise SystemExit(1)
+    if drift > args.max_drift:
+        print(f"❌ Cleanup slowed down by {drift:.2f}x over {args.calls} calls")
+        raise SystemExit(1)
+    print(f"✓ Cleanup time constant over {args.calls} calls")
+
+
+if __name__ == '__main__':
+    main()
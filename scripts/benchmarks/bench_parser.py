@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Per-page cost of RanobesParser.parse_chapter_content: lxml fast path vs the
+BeautifulSoup selector strategy.
+
+Both paths must return identical results; any difference is reported.
+
+Usage:
+  python benchmarks/bench_parser.py
+  python benchmarks/bench_parser.py --repeat 8 --rounds 10
+  python benchmarks/bench_parser.py --content-class chapter-content
+  python benchmarks/bench_parser.py --cache-dir output/html_cache --limit 200
+
+"""
+
+import argparse
+import copy
+
+import yaml
+
+from samples import SCRIPTS_DIR, load_pages, measure, summarize
+from utils.parser import RanobesParser
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark chapter content extraction')
+    ap.add_argument('--config', default=str(SCRIPTS_DIR / 'config.yaml'))
+    ap.add_argument('--cache-dir', help='Use pages from this HTML cache instead of the sample chapters')
+    ap.add_argument('--limit', type=int, help='Number of pages')
+    ap.add_argument('--repeat', type=int, default=4, help='Repeat each sample chapter N times to grow the page (default: 4)')
+    ap.add_argument('--rounds', type=int, default=5, help='Timing rounds, best is kept (default: 5)')
+    ap.add_argument('--content-class', default='text-content',
+                    help='Class of the sample pages\' content block, to exercise later selectors (default: text-content)')
+    args = ap.parse_args()
+
+    with open(args.config, 'r') as f:
+        site_config = yaml.safe_load(f).get('ranobes.top', {})
+
+    pages = load_pages(args.cache_dir, args.limit, args.repeat, args.content_class)
+    print(f"{len(pages)} pages, {sum(len(p) for p in pages) / len(pages) / 1024:.0f} KiB average")
+
+    fast = RanobesParser(copy.deepcopy(site_config))
+    full = RanobesParser(copy.deepcopy(site_config), fast_path=False)
+
+    mismatches = sum(fast.parse_chapter_content(p) != full.parse_chapter_content(p) for p in pages)
+    hits = sum(fast._fast_parse(p) is not None for p in pages)
+
+    full_times = measure(full.parse_chapter_content, pages, args.rounds)
+    fast_times = measure(fast.parse_chapter_content, pages, args.rounds)
+
+    print(f"  BeautifulSoup: {summarize(full_times)}")
+    print(f"  lxml fast path: {summarize(fast_times)} ({hits}/{len(pages)} pages took the fast path)")
+    speedups = sorted(f / s for f, s in zip(full_times, fast_times))
+    print(f"  speedup: {sum(full_times) / sum(fast_times):.1f}x overall, "
+          f"{speedups[0]:.1f}x-{speedups[-1]:.1f}x per page")
+    if mismatches:
+        print(f"❌ {mismatches} pages parsed differently")
+        raise SystemExit(1)
+    print("✓ Both paths return identical results")
+
+
+if __name__ == '__main__':
+    main()
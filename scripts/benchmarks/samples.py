@@ -0,0 +1,126 @@
+"""
+Sample inputs shared by the benchmarks.
+
+Chapters come from the stored sample database (output/lotm_sample.db) and are
+wrapped in a page that mirrors ranobes.top's chapter layout: scripts and
+styles in the head, a navigation menu, ad slots inside the text, and a
+comment section below it. Real pages can be used instead by pointing the
+benchmarks at an HTML cache directory.
+"""
+
+import html as html_lib
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+ROOT = SCRIPTS_DIR.parent
+SAMPLE_DB = ROOT / 'output' / 'lotm_sample.db'
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+def sample_chapters(db_path: Path = SAMPLE_DB) -> List[Dict]:
+    """Chapters (title, content) from the sample database, in reading order"""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            'SELECT title, content FROM chapters ORDER BY COALESCE(order_index, id)'
+        ).fetchall()
+    finally:
+        conn.close()
+    return [{'title': title, 'content': content or ''} for title, content in rows]
+
+
+def chapter_page(chapter: Dict, repeat: int = 1, content_class: str = 'text-content') -> str:
+    """A ranobes.top-style chapter page around chapter's text (repeated to grow the page)"""
+    paragraphs = [p for p in chapter['content'].split('\n\n') if p.strip()] * repeat
+    body = []
+    for idx, paragraph in enumerate(paragraphs):
+        body.append(f'<p>{html_lib.escape(paragraph)}</p>')
+        if idx % 15 == 7:
+            body.append('<div class="ads"><ins class="adsbygoogle" data-ad-slot="1"></ins>'
+                        '<script>(adsbygoogle = window.adsbygoogle || []).push({});</script></div>')
+    menu = ''.join(f'<li><a href="/novels/{i}.html">Novel {i}</a></li>' for i in range(60))
+    comments = ''.join(
+        f'<div class="comment"><div class="comment-head"><a href="/user/{i}">reader{i}</a></div>'
+        f'<div class="comment-body"><p>Thanks for the chapter! Comment number {i}.</p></div></div>'
+        for i in range(40)
+    )
+    return f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{html_lib.escape(chapter['title'])} | Ranobes</title>
+<style>body {{ font-family: sans-serif; }} .ads {{ margin: 1em 0; }}</style>
+<script>window.dle_root = '/'; var cfg = {{"skin": "ranobes"}};</script>
+</head>
+<body>
+<header class="header"><nav class="navigation"><ul>{menu}</ul></nav></header>
+<div class="breadcrumbs"><a href="/">Home</a> / <a href="/novels/">Novels</a></div>
+<main>
+<article class="story">
+<h1 class="title">{html_lib.escape(chapter['title'])}</h1>
+<div class="{content_class}" id="arrticle">
+{''.join(body)}
+</div>
+<div class="pages"><a href="#prev">Prev</a><a href="#next">Next</a></div>
+</article>
+<section class="comments">{comments}</section>
+</main>
+<footer><p>© Ranobes</p></footer>
+<script>document.querySelectorAll('.ads').forEach(function (el) {{ el.dataset.ready = 1; }});</script>
+</body>
+</html>
+'''
+
+
+def cached_pages(cache_dir: Path, limit: Optional[int] = None) -> List[str]:
+    """Raw chapter pages from an HTML cache directory"""
+    from utils.html_cache import HtmlCache
+
+    cache = HtmlCache(cache_dir, offline=True)
+    try:
+        # Raw and Selenium-rendered entries of one URL count once
+        urls = dict.fromkeys(
+            row[0].split(':', 1)[1] if row[0].startswith('selenium:') else row[0]
+            for row in cache.conn.execute('SELECT url FROM pages ORDER BY fetched_at')
+        )
+        pages = []
+        for url in urls:
+            if limit and len(pages) >= limit:
+                break
+            path = cache.lookup(url)
+            if path is not None:
+                pages.append(HtmlCache.read_object(path))
+        return pages
+    finally:
+        cache.close()
+
+
+def load_pages(cache_dir: Optional[str] = None, limit: Optional[int] = None, repeat: int = 1,
+               content_class: str = 'text-content') -> List[str]:
+    if cache_dir:
+        return cached_pages(Path(cache_dir), limit)
+    pages = [chapter_page(chapter, repeat, content_class) for chapter in sample_chapters()]
+    return pages[:limit] if limit else pages
+
+
+def measure(fn: Callable, items: Iterable, rounds: int = 5) -> List[float]:
+    """Best-of-rounds seconds per call of fn for each item"""
+    items = list(items)
+    best = [float('inf')] * len(items)
+    for _ in range(rounds):
+        for idx, item in enumerate(items):
+            start = time.perf_counter()
+            fn(item)
+            best[idx] = min(best[idx], time.perf_counter() - start)
+    return best
+
+
+def summarize(seconds: List[float]) -> str:
+    return (f"{statistics.median(seconds) * 1000:.3f} ms median, "
+            f"{max(seconds) * 1000:.3f} ms max, {len(seconds) / sum(seconds):.0f} pages/s")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Build the Android app's prepackaged database from scraped chapters.
+
+Reads chapters from any scraper output (chapters JSON or SQLite export) and
+writes a database with exactly the schema Room exported for AppDatabase:
+dense order_index, ids assigned in reading order, the entity's indexes, the
+page_size that gives the smallest file, and a vacuumed layout.
+
+The file carries no room_master_table: Room validates a prepackaged database
+against the entity schema on first open and writes its own identity hash.
+The expression index ChapterDao navigates by is not part of the entity, so
+AppDatabase creates it after validation.
+
+Usage:
+  python build_asset_db.py --input output/chapters_133485.db
+  python build_asset_db.py --input output/chapters_133485.json --book-id 133485
+  python build_asset_db.py --input output/book_133485.db --output /tmp/lotm.db --page-size 8192
+
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.content_codec import CompressedContentReader
+
+ROOT = Path(__file__).resolve().parent.parent
+SCHEMA_DIR = ROOT / 'app' / 'schemas' / 'com.reader.lotm.data.local.AppDatabase'
+ASSET_DB = ROOT / 'app' / 'src' / 'main' / 'assets' / 'databases' / 'lotm.db'
+
+PAGE_SIZES = (4096, 8192, 16384, 32768, 65536)
+
+# Created by AppDatabase on open, since Room cannot declare expression indexes.
+# SQLite only uses it when a query repeats the expression verbatim; the rowid
+# (id) is part of every index, so it covers the next/previous lookups.
+READING_ORDER_INDEX = 'CREATE INDEX IF NOT EXISTS index_chapters_reading_order ON chapters(COALESCE(order_index, id))'
+
+DAO_QUERIES = {
+    'getAllChapters': 'SELECT * FROM chapters ORDER BY COALESCE(order_index, id) ASC',
+    'getChapterByOrder': 'SELECT * FROM chapters WHERE order_index = 0',
+    'getNextChapterId': 'SELECT id FROM chapters WHERE COALESCE(order_index, id) > '
+                        '(SELECT COALESCE(order_index, id) FROM chapters WHERE id = 1) '
+                        'ORDER BY COALESCE(order_index, id) ASC LIMIT 1',
+    'getPreviousChapterId': 'SELECT id FROM chapters WHERE COALESCE(order_index, id) < '
+                            '(SELECT COALESCE(order_index, id) FROM chapters WHERE id = 1) '
+                            'ORDER BY COALESCE(order_index, id) DESC LIMIT 1',
+}
+
+
+def load_room_schema(schema_dir: Path = SCHEMA_DIR) -> Dict:
+    """Latest exported Room schema (highest numbered <version>.json)"""
+    versions = sorted(schema_dir.glob('*.json'), key=lambda p: int(p.stem))
+    if not versions:
+        raise SystemExit(f"No Room schema found in {schema_dir}")
+    with open(versions[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)['database']
+
+
+def decode_content(input_path: Path, chapters: List[Dict]):
+    """Decompress content of a `sqlite.compression: zstd` export in place; the app reads plain text"""
+    if not any(isinstance(ch.get('content'), bytes) for ch in chapters):
+        return
+    reader = CompressedContentReader(input_path)
+    try:
+        for ch in chapters:
+            if isinstance(ch.get('content'), bytes):
+                codec = reader.codec(ch.get('book_id'))
+                if codec is None:
+                    raise SystemExit(f"Chapter {ch.get('id')} in {input_path} is compressed "
+                                     f"but book {ch.get('book_id')} has no dictionary")
+                ch['content'] = codec.decompress(ch['content'])
+    finally:
+        reader.close()
+
+
+def read_chapters(input_path: Path, book_id: Optional[str] = None) -> List[Dict]:
+    """Read chapters from a scraper JSON file or SQLite export, in reading order"""
+    if input_path.suffix == '.db':
+        conn = sqlite3.connect(input_path)
+        conn.row_factory = sqlite3.Row
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(chapters)')}
+        query = 'SELECT * FROM chapters'
+        params = ()
+        if book_id and 'book_id' in columns:
+            query += ' WHERE book_id = ?'
+            params = (book_id,)
+        query += ' ORDER BY COALESCE(order_index, id), id'
+        chapters = [dict(row) for row in conn.execute(query, params)]
+        conn.close()
+        decode_content(input_path, chapters)
+    else:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            book_id = book_id or data.get('book_id') or data.get('book_info', {}).get('book_id')
+            chapters = data.get('chapters', [])
+        else:
+            chapters = data
+        chapters = [dict(ch, book_id=ch.get('book_id', book_id)) for ch in chapters]
+
+    # Chapters without a position keep their file order after positioned ones
+    def position(item):
+        idx, ch = item
+        order = ch.get('order_index', ch.get('order'))
+        return (order is None, order if order is not None else 0, idx)
+
+    ordered = [ch for _, ch in sorted(enumerate(chapters), key=position)]
+
+    seen = set()
+    result = []
+    for ch in ordered:
+        url = ch.get('url')
+        if url and url in seen:
+            continue
+        seen.add(url)
+        result.append(ch)
+    return result
+
+
+def write_database(path: Path, chapters: List[Dict], schema: Dict, page_size: int,
+                   book_id: Optional[str] = None):
+    """Write chapters to a fresh file with the Room schema and the given page size"""
+    if path.exists():
+        path.unlink()
+    conn = sqlite3.connect(path)
+    try:
+        # page_size only takes effect before the first table is created
+        conn.execute(f'PRAGMA page_size = {page_size}')
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+
+        for entity in schema['entities']:
+            conn.execute(entity['createSql'].replace('${TABLE_NAME}', entity['tableName']))
+
+        # ids follow reading order and order_index is dense, so
+        # COALESCE(order_index, id) never falls back to id
+        conn.executemany(
+            'INSERT INTO chapters (id, title, content, order_index, book_id, url) VALUES (?, ?, ?, ?, ?, ?)',
+            (
+                (
+                    idx + 1,
+                    ch.get('title') or 'Untitled',
+                    ch.get('content'),
+                    idx,
+                    ch.get('book_id') or book_id,
+                    ch.get('url'),
+                )
+                for idx, ch in enumerate(chapters)
+            )
+        )
+
+        for entity in schema['entities']:
+            for index in entity.get('indices', []):
+                conn.execute(index['createSql'].replace('${TABLE_NAME}', entity['tableName']))
+        # Room copies the asset only when its version matches the database's
+        conn.execute(f"PRAGMA user_version = {schema['version']}")
+        conn.commit()
+
+        conn.execute('ANALYZE')
+        conn.commit()
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+
+def check_query_plans(path: Path):
+    """Print how SQLite executes each ChapterDao query once the app has opened the built file"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        # Plan against the indexes the app will have, without changing the file
+        conn.execute('BEGIN')
+        conn.execute(READING_ORDER_INDEX)
+        for name, sql in DAO_QUERIES.items():
+            plan = '; '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql))
+            print(f"   {name}: {plan}")
+        conn.execute('ROLLBACK')
+    finally:
+        conn.close()
+
+
+def build_asset_db(input_path: Path, output_path: Path = ASSET_DB, book_id: str = None,
+                   page_size: int = None, schema_dir: Path = SCHEMA_DIR) -> Path:
+    schema = load_room_schema(schema_dir)
+    chapters = read_chapters(input_path, book_id)
+    if not chapters:
+        raise SystemExit(f"No chapters found in {input_path}")
+    print(f"Loaded {len(chapters)} chapters from {input_path}")
+
+    old_size = output_path.stat().st_size if output_path.exists() else None
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.time()
+
+    # Build into a temp dir first so input and output may be the same file
+    with tempfile.TemporaryDirectory(dir=output_path.parent) as tmp_dir:
+        candidates = [page_size] if page_size else list(PAGE_SIZES)
+        sizes = {}
+        for size in candidates:
+            path = Path(tmp_dir) / f'{size}.db'
+            write_database(path, chapters, schema, size, book_id)
+            sizes[size] = path.stat().st_size
+            print(f"   page_size {size:>5}: {sizes[size]:,} bytes")
+
+        # Smallest file wins; on a tie the larger page needs fewer overflow reads
+        best = min(candidates, key=lambda s: (sizes[s], -s))
+        os.replace(Path(tmp_dir) / f'{best}.db', output_path)
+
+    print(f"✓ Built {output_path} in {time.time() - start:.1f}s "
+          f"(schema v{schema['version']}, page_size {best}, {sizes[best]:,} bytes"
+          + (f", was {old_size:,}" if old_size is not None else '') + ")")
+    check_query_plans(output_path)
+    return output_path
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Build the Room-ready asset database from scraped chapters')
+    ap.add_argument('--input', required=True, help='Chapters JSON or SQLite file from a scraper')
+    ap.add_argument('--output', default=str(ASSET_DB), help=f'Output database (default: {ASSET_DB})')
+    ap.add_argument('--book-id', help='Only take this book from a SQLite input / fill missing book_id')
+    ap.add_argument('--page-size', type=int, choices=PAGE_SIZES,
+                    help='Force a page size instead of picking the smallest result')
+    ap.add_argument('--schema-dir', default=str(SCHEMA_DIR), help='Room exported schema directory')
+    args = ap.parse_args()
+
+    build_asset_db(
+        Path(args.input),
+        Path(args.output),
+        book_id=args.book_id,
+        page_size=args.page_size,
+        schema_dir=Path(args.schema_dir)
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,6 @@ Scrapes all chapters with proper delays and checkpointing
 """
 import argparse
 import sys
-import time
-import json
 import sqlite3
 from pathlib import Path
 from datetime import datetime
@@ -18,18 +16,28 @@ from utils.cloudflare_bypass import CloudflareBypass
 from utils.parser import RanobesParser
 from utils.cleaner import ContentCleaner
 from utils.checkpoint import CheckpointManager
+from utils.chapter_list import fetch_list_page
+from utils.updater import find_new_chapters
+from utils.journal import JournaledStore
+from utils.bulk_writer import SqliteBulkWriter
+from utils.json_stream import JsonArrayWriter, iter_json_array
+from utils.pipeline import ChapterPipeline
 import yaml
 
 
 class CompleteScraper:
-    def __init__(self, book_id: str, config_path: str = "config.yaml"):
+    def __init__(self, book_id: str, config_path: str = "config.yaml", from_cache: bool = False):
         self.book_id = book_id
         self.config = self._load_config(config_path)
         self.site_config = self.config.get('ranobes.top', {})
+        self.from_cache = from_cache
+        if from_cache:
+            # Replay pages from the raw HTML cache, never touch the network
+            self.site_config.setdefault('cache', {})['offline'] = True
         
         self.cf = CloudflareBypass(self.site_config)
         self.parser = RanobesParser(self.site_config)
-        self.cleaner = ContentCleaner()
+        self.cleaner = ContentCleaner(self.site_config)
         
         self.output_dir = Path('output')
         self.output_dir.mkdir(exist_ok=True)
@@ -37,6 +45,7 @@ class CompleteScraper:
         self.checkpoint_file = self.output_dir / f'complete_scrape_{book_id}.json'
         self.db_file = self.output_dir / f'chapters_{book_id}.db'
         self.json_file = self.output_dir / f'chapters_{book_id}_full.json'
+        self._checkpoint_store = None
         
         self._init_database()
     
@@ -63,26 +72,27 @@ class CompleteScraper:
         conn.commit()
         conn.close()
     
-    def _save_checkpoint(self, data: dict):
-        """Save progress checkpoint"""
-        with open(self.checkpoint_file, 'w') as f:
-            json.dump(data, f, indent=2)
+    @staticmethod
+    def _apply_checkpoint(data: dict, record: dict):
+        """Apply one journal record to checkpoint data"""
+        if record.get('op') == 'completed':
+            data['completed_urls'].append(record['url'])
+        elif record.get('op') == 'failed':
+            data.setdefault('failed_urls', []).append({'url': record['url'], 'reason': record['reason']})
+    
+    def _save_checkpoint(self, record: dict):
+        """Append one progress record to the checkpoint journal"""
+        self._checkpoint_store.append(record)
     
     def _load_checkpoint(self) -> dict:
         """Load progress checkpoint"""
-        if self.checkpoint_file.exists():
-            with open(self.checkpoint_file, 'r') as f:
-                return json.load(f)
-        return {'completed_urls': [], 'failed_urls': [], 'last_index': 0}
-    
-    def _rate_limit(self, multiplier: float = 1.0):
-        """Apply rate limiting between requests"""
-        import random
-        rate_config = self.site_config.get('rate_limit', {})
-        min_delay = rate_config.get('min', 3) * multiplier
-        max_delay = rate_config.get('max', 8) * multiplier
-        delay = random.uniform(min_delay, max_delay)
-        time.sleep(delay)
+        if self._checkpoint_store is None:
+            self._checkpoint_store = JournaledStore(
+                self.checkpoint_file,
+                self._apply_checkpoint,
+                lambda: {'completed_urls': [], 'failed_urls': []}
+            )
+        return self._checkpoint_store.data
     
     def collect_all_links(self) -> list:
         """Collect all chapter links from all pages"""
@@ -91,6 +101,8 @@ class CompleteScraper:
         all_links = []
         page = 1
         max_pages = 100  # Safety limit
+        base_url = self.site_config.get('base_url', 'https://ranobes.top')
+        data_mode = self.site_config.get('list_data_mode', True)
         
         while page <= max_pages:
             if page == 1:
@@ -100,14 +112,13 @@ class CompleteScraper:
             
             print(f"  📄 Fetching page {page}... ", end='', flush=True)
             
-            html = self.cf.get(url, force_selenium=True)
+            html, chapters, mode = fetch_list_page(self.cf, self.parser, url, base_url,
+                                                   data_mode=data_mode)
             if not html:
                 print("❌ Failed")
                 break
             
-            print("✅")
-            
-            chapters, next_url = self.parser.parse_chapter_list(html, url)
+            print(f"✅ ({mode})")
             
             if not chapters:
                 print(f"  ⚠️  No chapters found on page {page}")
@@ -122,97 +133,130 @@ class CompleteScraper:
                 print(f"  📊 Detected {total_pages} total pages")
                 max_pages = total_pages
             
-            if not next_url:
+            if page >= max_pages:
                 break
             
             page += 1
-            self._rate_limit(multiplier=2.5)  # Longer delays for list pages
         
         print(f"\n✅ Collected {len(all_links)} chapter links from {page} pages\n")
         
-        # Save links
-        links_file = self.output_dir / f'all_links_{self.book_id}.json'
-        with open(links_file, 'w') as f:
-            json.dump(all_links, f, indent=2)
+        # Page parsers number chapters per page, renumber across the whole list
+        for idx, link in enumerate(all_links):
+            link['order_index'] = idx
         
+        self._save_links(all_links)
         return all_links
     
-    def scrape_chapters(self, links: list, start_from: int = 0):
-        """Scrape all chapters with checkpointing"""
+    def _save_links(self, links: list):
+        links_file = self.output_dir / f'all_links_{self.book_id}.json'
+        with JsonArrayWriter(links_file, ensure_ascii=True) as writer:
+            writer.write_all(links)
+    
+    def _load_known_links(self) -> list:
+        """Links from the last run: the links file, or the database if it is missing"""
+        links_file = self.output_dir / f'all_links_{self.book_id}.json'
+        if links_file.exists():
+            links = list(iter_json_array(links_file))
+            for idx, link in enumerate(links):
+                link.setdefault('order_index', idx)
+            return links
+        
+        conn = sqlite3.connect(self.db_file)
+        rows = conn.execute('''
+            SELECT url, title, order_index FROM chapters
+            WHERE book_id = ? AND url IS NOT NULL
+            ORDER BY COALESCE(order_index, id)
+        ''', (self.book_id,)).fetchall()
+        conn.close()
+        return [{'url': url, 'title': title, 'order_index': order_index}
+                for url, title, order_index in rows]
+    
+    def _export_json(self, conn: sqlite3.Connection):
+        """Stream the JSON copy of every chapter stored for this book, row by row"""
+        rows = conn.execute('''
+            SELECT title, content, order_index, url FROM chapters
+            WHERE book_id = ?
+            ORDER BY COALESCE(order_index, id)
+        ''', (self.book_id,))
+        with JsonArrayWriter(self.json_file) as writer:
+            writer.write_all(
+                {'title': title, 'content': content, 'order': order_index, 'url': url}
+                for title, content, order_index, url in rows
+            )
+    
+    def scrape_chapters(self, links: list):
+        """
+        Scrape all chapters with checkpointing
+        
+        Chapters already completed in the checkpoint are skipped wherever they
+        are in links: retries finish out of order, so there is no single
+        position to resume from.
+        """
         print(f"📖 Step 2: Scraping {len(links)} chapters...\n")
         
         checkpoint = self._load_checkpoint()
         completed_urls = set(checkpoint['completed_urls'])
         failed_urls = checkpoint.get('failed_urls', [])
         
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        # Rows are written in chunked transactions; a chapter is only marked
+        # completed in the checkpoint once the chunk holding it is committed
+        writer = SqliteBulkWriter(
+            self.db_file, ('title', 'content', 'order_index', 'book_id', 'url'),
+            chunk_size=self.site_config.get('sqlite', {}).get('batch_size', 25)
+        )
+        unflushed = []
+        
+        def commit_flushed():
+            for record in unflushed:
+                self._save_checkpoint(record)
+            unflushed.clear()
+        
+        # Skip chapters already completed
+        pending = [
+            dict(chapter_info, index=idx)
+            for idx, chapter_info in enumerate(links)
+            if chapter_info['url'] not in completed_urls
+        ]
+        progress = tqdm(initial=len(links) - len(pending), total=len(links))
         
-        all_chapters = []
+        def fetch(_session, chapter_info: dict):
+            return self.cf.get(chapter_info['url'], force_selenium=True)
         
-        for idx, chapter_info in enumerate(tqdm(links[start_from:], initial=start_from, total=len(links))):
+        def write(chapter_info: dict, parsed: dict):
+            # Called from the pipeline's single writer thread only
             url = chapter_info['url']
-            
-            # Skip if already completed
-            if url in completed_urls:
-                continue
-            
-            try:
-                # Fetch chapter
-                html = self.cf.get(url, force_selenium=True)
-                if not html:
-                    failed_urls.append({'url': url, 'reason': 'Failed to fetch HTML'})
-                    continue
-                
-                # Parse content
-                chapter_data = self.parser.parse_chapter_content(html)
-                
-                # Clean content
-                cleaned_content = self.cleaner.clean_text(chapter_data['content'])
-                
-                # Save to database
-                cursor.execute('''
-                    INSERT INTO chapters (title, content, order_index, book_id, url)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    chapter_data['title'],
-                    cleaned_content,
-                    idx,
-                    self.book_id,
-                    url
-                ))
-                conn.commit()
-                
-                # Add to JSON collection
-                all_chapters.append({
-                    'title': chapter_data['title'],
-                    'content': cleaned_content,
-                    'order': idx,
-                    'url': url
-                })
-                
-                # Update checkpoint
-                completed_urls.add(url)
-                checkpoint['completed_urls'] = list(completed_urls)
-                checkpoint['failed_urls'] = failed_urls
-                checkpoint['last_index'] = start_from + idx
-                self._save_checkpoint(checkpoint)
-                
-                # Rate limit
-                self._rate_limit(multiplier=1.5)
-                
-            except Exception as e:
-                print(f"\n❌ Error scraping {url}: {e}")
-                failed_urls.append({'url': url, 'reason': str(e)})
-                checkpoint['failed_urls'] = failed_urls
-                self._save_checkpoint(checkpoint)
-                continue
+            completed_urls.add(url)
+            unflushed.append({'op': 'completed', 'url': url})
+            if writer.add({
+                'title': parsed['title'],
+                'content': parsed['content'],
+                'order_index': chapter_info.get('order_index', chapter_info['index']),
+                'book_id': self.book_id,
+                'url': url
+            }):
+                commit_flushed()
+            progress.update(1)
         
-        conn.close()
+        def failed(chapter_info: dict, stage: str, error: str):
+            if stage != 'fetch':
+                print(f"\n❌ Error scraping {chapter_info['url']}: {error}")
+            self._save_checkpoint({'op': 'failed', 'url': chapter_info['url'], 'reason': error})
+            progress.update(1)
+        
+        try:
+            # Fetching, parsing and writing overlap; the browser session stays
+            # on one fetch thread and the writer connection on another
+            ChapterPipeline.from_config(self.site_config, fetch, write, on_failure=failed).run(pending)
+        finally:
+            progress.close()
+            writer.flush()
+            commit_flushed()
+        
+        # Save complete JSON (includes chapters from earlier runs)
+        self._export_json(writer.conn)
         
-        # Save complete JSON
-        with open(self.json_file, 'w', encoding='utf-8') as f:
-            json.dump(all_chapters, f, ensure_ascii=False, indent=2)
+        writer.close(optimize=True)
+        self._checkpoint_store.close()
         
         print(f"\n✅ Scraping complete!")
         print(f"  📊 Successfully scraped: {len(completed_urls)} chapters")
@@ -223,6 +267,39 @@ class CompleteScraper:
         if failed_urls:
             print(f"\n⚠️  Failed URLs saved in checkpoint. Run again to retry.")
     
+    def update(self):
+        """Fetch only chapters published since the last run and upsert them"""
+        start_time = datetime.now()
+        print(f"🔄 Checking for new chapters at {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"📚 Book ID: {self.book_id}\n")
+        
+        known_links = self._load_known_links()
+        if not known_links:
+            print("❌ No previous scrape found. Run without --update first.")
+            return
+        
+        links, new_links = find_new_chapters(
+            self.cf, self.parser, self.site_config, self.book_id, known_links
+        )
+        
+        # New chapters may shift positions of the existing ones
+        conn = sqlite3.connect(self.db_file)
+        conn.executemany('''
+            UPDATE chapters SET order_index = ?
+            WHERE book_id = ? AND url = ? AND order_index IS NOT ?
+        ''', [(link['order_index'], self.book_id, link['url'], link['order_index']) for link in links])
+        conn.commit()
+        conn.close()
+        self._save_links(links)
+        
+        if not new_links:
+            print("✅ Already up to date")
+            return
+        
+        self.scrape_chapters(new_links)
+        
+        print(f"\n⏱️  Total time: {datetime.now() - start_time}")
+    
     def run(self, links_only: bool = False, resume: bool = False):
         """Run complete scraping process"""
         start_time = datetime.now()
@@ -234,8 +311,7 @@ class CompleteScraper:
         
         if resume and links_file.exists():
             print("📂 Loading existing links...")
-            with open(links_file, 'r') as f:
-                links = json.load(f)
+            links = list(iter_json_array(links_file))
             print(f"✅ Loaded {len(links)} links\n")
         else:
             links = self.collect_all_links()
@@ -246,12 +322,12 @@ class CompleteScraper:
         
         # Step 2: Scrape chapters
         checkpoint = self._load_checkpoint()
-        start_from = checkpoint.get('last_index', 0)
+        done = len(checkpoint['completed_urls'])
         
-        if resume and start_from > 0:
-            print(f"📂 Resuming from chapter {start_from + 1}...\n")
+        if resume and done:
+            print(f"📂 Resuming: {done} chapters already scraped...\n")
         
-        self.scrape_chapters(links, start_from=start_from)
+        self.scrape_chapters(links)
         
         end_time = datetime.now()
         duration = end_time - start_time
@@ -264,12 +340,17 @@ def main():
     parser.add_argument('--book-id', default='133485', help='Book ID to scrape')
     parser.add_argument('--links-only', action='store_true', help='Only collect links, don\'t scrape content')
     parser.add_argument('--resume', action='store_true', help='Resume from checkpoint')
+    parser.add_argument('--update', action='store_true', help='Only fetch chapters added since the last run')
     parser.add_argument('--config', default='config.yaml', help='Path to config file')
+    parser.add_argument('--from-cache', action='store_true', help='Replay pages from the raw HTML cache only (no network)')
     
     args = parser.parse_args()
     
-    scraper = CompleteScraper(args.book_id, args.config)
-    scraper.run(links_only=args.links_only, resume=args.resume)
+    scraper = CompleteScraper(args.book_id, args.config, from_cache=args.from_cache)
+    if args.update:
+        scraper.update()
+    else:
+        scraper.run(links_only=args.links_only, resume=args.resume)
 
 
 if __name__ == '__main__':
@@ -8,33 +8,52 @@ content one by one, with checkpointing so you can resume at any time.
 Usage:
   python fetch_chapters.py --links output/chapter_links_133485.json
   python fetch_chapters.py --links output/chapter_links_133485.json --batch-size 50
-  python fetch_chapters.py --links output/chapter_links_133485.json --delay-min 5 --delay-max 10
+  python fetch_chapters.py --links output/chapter_links_133485.json --rpm 10
+  python fetch_chapters.py --links output/chapter_links_133485.json --workers 4
+  python fetch_chapters.py --links output/chapter_links_133485.json --async 50
+  python fetch_chapters.py --links output/chapter_links_133485.json --queue output/queue_133485.db
 """
 
 import argparse
-import json
-import time
-import random
+import asyncio
+import itertools
 import sys
+import threading
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, Dict, Optional
 import yaml
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 from utils.cloudflare_bypass import CloudflareBypass
+from utils.circuit_breaker import CHALLENGE
+from utils.async_bypass import AsyncCloudflareBypass
 from utils.parser import RanobesParser
 from utils.cleaner import ContentCleaner
 from utils.formatter import OutputFormatter
+from utils.journal import JournaledStore
+from utils.json_stream import JsonArrayWriter, iter_json_array
+from utils.pipeline import ChapterPipeline
+from utils.rate_limiter import RateLimiter
+from utils.work_queue import WorkQueue
 
 
 class ChapterFetcher:
-    def __init__(self, config_path: str = 'config.yaml'):
+    def __init__(self, config_path: str = 'config.yaml', from_cache: bool = False):
         self.config = self._load_config(config_path)
         self.site_config = self.config.get('ranobes.top', {})
+        self.from_cache = from_cache
+        if from_cache:
+            # Replay pages from the raw HTML cache, never touch the network
+            self.site_config.setdefault('cache', {})['offline'] = True
         self.parser = RanobesParser(self.site_config)
-        self.cleaner = ContentCleaner()
+        self.cleaner = ContentCleaner(self.site_config)
         self.checkpoint_data = {}
+        self._checkpoint_store = None
+        self._db_writer = None
+        self._db_codec = None
+        self.downloaded = 0
+        self._lock = threading.Lock()
         
     def _load_config(self, path: str) -> dict:
         cfg = Path(path)
@@ -43,34 +62,40 @@ class ChapterFetcher:
         with open(cfg, 'r', encoding='utf-8') as f:
             return yaml.safe_load(f)
     
+    @staticmethod
+    def _apply_checkpoint(data: dict, record: dict):
+        """Apply one journal record to checkpoint data"""
+        if record.get('op') == 'chapter':
+            data['chapters'].append(record['chapter'])
+            data['completed_urls'].append(record['chapter']['url'])
+    
     def _load_checkpoint(self, checkpoint_file: Path) -> dict:
-        if checkpoint_file.exists():
-            try:
-                with open(checkpoint_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Warning: Could not load checkpoint: {e}")
-        return {'completed_urls': [], 'chapters': []}
+        # Snapshot + append-only journal: one line per chapter instead of a full rewrite
+        self._checkpoint_store = JournaledStore(
+            checkpoint_file,
+            self._apply_checkpoint,
+            lambda: {'completed_urls': [], 'chapters': []}
+        )
+        return self._checkpoint_store.data
     
-    def _save_checkpoint(self, checkpoint_file: Path):
+    def _save_checkpoint(self, chapter_data: Dict):
         try:
-            with open(checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(self.checkpoint_data, f, ensure_ascii=False, indent=2)
+            self._checkpoint_store.append({'op': 'chapter', 'chapter': chapter_data})
         except Exception as e:
             print(f"Warning: Could not save checkpoint: {e}")
     
     def _save_output(self, output_file: Path, book_id: str):
         """Save collected chapters to multiple formats"""
+        # Workers finish out of order, so restore reading order before export
+        # (in place: the checkpoint already holds every chapter)
         chapters = self.checkpoint_data.get('chapters', [])
+        chapters.sort(key=lambda ch: ch.get('order_index', 0))
         
         # JSON
         json_file = output_file.with_suffix('.json')
         try:
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'book_id': book_id,
-                    'chapters': chapters
-                }, f, ensure_ascii=False, indent=2)
+            with JsonArrayWriter(json_file, 'chapters', {'book_id': book_id}) as writer:
+                writer.write_all(chapters)
             print(f"   Saved to {json_file}")
         except Exception as e:
             print(f"   Warning: Could not save JSON: {e}")
@@ -78,33 +103,254 @@ class ChapterFetcher:
         # SQLite database for Android app
         db_file = output_file.with_suffix('.db')
         try:
-            OutputFormatter.export_sqlite(chapters, str(db_file), book_id)
+            sqlite_config = self.site_config.get('sqlite', {})
+            OutputFormatter.export_sqlite(
+                chapters, str(db_file), book_id,
+                compression=sqlite_config.get('compression'),
+                compression_level=sqlite_config.get('compression_level', 12)
+            )
             print(f"   Saved to {db_file}")
         except Exception as e:
             print(f"   Warning: Could not save SQLite: {e}")
     
+    def _flush_output(self):
+        """Write chapters recorded since the last flush (no full re-export)"""
+        try:
+            written = self._db_writer.flush()
+            if written:
+                print(f"   Appended {written} chapters to {self._db_writer.path}")
+        except Exception as e:
+            print(f"   Warning: Could not save SQLite: {e}")
+    
+    def _fetch_html(self, cf: CloudflareBypass, link_info: Dict, idx: int) -> Optional[str]:
+        """Fetch a single chapter page, falling back to Selenium for a Cloudflare challenge"""
+        url = link_info.get('url')
+        
+        html = cf.get(url, force_selenium=False)
+        # Missing pages and hosts with an open circuit are left to the retry
+        # queue; offline, the rendered copy may be cached under its own key
+        if not html and (cf.last_failure == CHALLENGE or self.from_cache):
+            print(f"   [{idx+1}] Failed to fetch, trying Selenium...")
+            html = cf.get(url, force_selenium=True)
+        
+        return html
+    
+    def _chapter_data(self, parsed: Dict, link_info: Dict, idx: int) -> Dict:
+        """Chapter dict from parse_chapter_html's result"""
+        return {
+            'url': link_info.get('url'),
+            'title': parsed['normalized_title'] if parsed['title'] else link_info.get('title', 'Unknown'),
+            'content': parsed['content'],
+            'order_index': link_info.get('order_index', idx)
+        }
+    
+    def _parse_chapter(self, html: Optional[str], link_info: Dict, idx: int) -> Optional[Dict]:
+        """Turn fetched HTML into a chapter dict, returning None on failure"""
+        url = link_info.get('url')
+        title = link_info.get('title', 'Unknown')
+        order_idx = link_info.get('order_index', idx)
+        
+        if not html:
+            print(f"   [{idx+1}] ❌ Failed to fetch chapter")
+            # Save debug
+            try:
+                with open(f'scripts/debug_chapter_{idx}.html', 'w', encoding='utf-8') as f:
+                    f.write('')
+            except:
+                pass
+            return None
+        
+        # Parse content
+        try:
+            parsed = self.parser.parse_chapter_content(html)
+            return {
+                'url': url,
+                'title': self.cleaner.normalize_title(parsed['title']) if parsed['title'] else title,
+                'content': self.cleaner.clean_text(parsed['content']),
+                'order_index': order_idx
+            }
+        except Exception as e:
+            print(f"   [{idx+1}] ❌ Parse error: {e}")
+            return None
+    
+    def _record_chapter(self, chapter_data: Dict, completed_urls: set, output_file: Path,
+                        book_id: str):
+        """Add a downloaded chapter to the checkpoint (safe to call from workers)"""
+        with self._lock:
+            if chapter_data['url'] in completed_urls:
+                return
+            # Journal append also adds the chapter to self.checkpoint_data
+            self._save_checkpoint(chapter_data)
+            completed_urls.add(chapter_data['url'])
+            
+            print(f"   ✓ Downloaded [{chapter_data['order_index']}] ({len(chapter_data['content'])} chars)")
+            
+            # Append the new chapters to the database every 10 chapters
+            self._db_writer.add(OutputFormatter.chapter_row(chapter_data, book_id, codec=self._db_codec))
+            if len(self.checkpoint_data['chapters']) % 10 == 0:
+                self._flush_output()
+    
+    def _fetch_pipelined(self, links: Iterable[Dict], start_index: int, completed_urls: set,
+                         output_file: Path, book_id: str, workers: int):
+        """
+        Fetch chapters with N independent sessions behind the shared rate
+        limiter, parsing in worker processes while the next pages download
+        """
+        pending = []
+        total = start_index
+        for idx, link_info in enumerate(links, start=start_index):
+            total = idx + 1
+            url = link_info.get('url')
+            if not url:
+                print(f"Skipping item {idx}: no URL")
+                continue
+            if url in completed_urls:
+                print(f"[{idx+1}] Skipping (already completed): {link_info.get('title', 'Unknown')}")
+                continue
+            pending.append({'idx': idx, 'link': link_info, 'url': url})
+        
+        print(f"{len(pending)} chapters queued")
+        
+        # Each fetch thread owns its own session (cloudscraper + lazily created
+        # browser); all of them draw from the same per-host rate limiter
+        def fetch(cf: CloudflareBypass, item: Dict) -> Optional[str]:
+            idx, link_info = item['idx'], item['link']
+            print(f"[{threading.current_thread().name}] [{idx+1}/{total}] Fetching: {link_info.get('title', 'Unknown')}")
+            return self._fetch_html(cf, link_info, idx)
+        
+        def write(item: Dict, parsed: Dict):
+            chapter_data = self._chapter_data(parsed, item['link'], item['idx'])
+            self._record_chapter(chapter_data, completed_urls, output_file, book_id)
+        
+        def failed(item: Dict, stage: str, error: str):
+            print(f"   [{item['idx']+1}] ❌ {stage.capitalize()} failed: {error}")
+        
+        ChapterPipeline.from_config(
+            self.site_config, fetch, write,
+            session_factory=lambda: CloudflareBypass(self.site_config),
+            fetch_workers=workers,
+            on_failure=failed
+        ).run(pending)
+    
+    async def _fetch_async(self, links: Iterable[Dict], start_index: int, completed_urls: set,
+                           output_file: Path, book_id: str, concurrency: int):
+        """Fetch chapters as overlapping coroutines on one thread"""
+        async with AsyncCloudflareBypass(self.site_config, concurrency=concurrency) as acf:
+            async def fetch_one(idx: int, link_info: Dict):
+                url = link_info['url']
+                html = await acf.fetch(url)
+                # As in _fetch_html: a browser only for a Cloudflare challenge
+                if not html and (acf.last_failure == CHALLENGE or self.from_cache):
+                    print(f"   [{idx+1}] Failed to fetch, trying Selenium...")
+                    html = await acf.fetch(url, force_selenium=True)
+                
+                chapter_data = self._parse_chapter(html, link_info, idx)
+                if chapter_data and not chapter_data['content'] and not self.from_cache:
+                    acf.report_empty(url)
+                if chapter_data:
+                    self._record_chapter(chapter_data, completed_urls, output_file, book_id)
+            
+            pending = [
+                fetch_one(idx, link_info)
+                for idx, link_info in enumerate(links, start=start_index)
+                if link_info.get('url') and link_info['url'] not in completed_urls
+            ]
+            print(f"{len(pending)} chapters queued")
+            await asyncio.gather(*pending)
+    
+    def _fetch_from_queue(self, work_queue: WorkQueue, book_id: str, workers: int):
+        """
+        Fetch chapters leased from a shared work queue until it is drained
+        
+        Any number of processes can run this on one queue. A chapter is acked
+        only after its row is committed to the database, so a crash leaves it
+        leased until the lease expires and another worker picks it up.
+        """
+        claim_size = self.site_config.get('work_queue', {}).get('claim_batch', 20)
+        unacked = []
+        
+        def commit():
+            if not unacked:
+                return
+            try:
+                self._db_writer.flush()
+            except Exception as e:
+                # Not acked: the leases run out and the chapters are fetched again
+                print(f"   Warning: Could not save SQLite: {e}")
+            else:
+                work_queue.ack(unacked)
+                print(f"   Appended {len(unacked)} chapters to {self._db_writer.path}")
+            unacked.clear()
+        
+        def fetch(cf: CloudflareBypass, item: Dict) -> Optional[str]:
+            # Still working: keep this worker's leases from expiring under it
+            work_queue.renew()
+            print(f"[{threading.current_thread().name}] [{item['idx']+1}] Fetching: {item['link'].get('title', 'Unknown')}")
+            return self._fetch_html(cf, item['link'], item['idx'])
+        
+        def write(item: Dict, parsed: Dict):
+            chapter_data = self._chapter_data(parsed, item['link'], item['idx'])
+            self._db_writer.add(OutputFormatter.chapter_row(chapter_data, book_id, codec=self._db_codec))
+            unacked.append(item['url'])
+            self.downloaded += 1
+            print(f"   ✓ Downloaded [{chapter_data['order_index']}] ({len(chapter_data['content'])} chars)")
+            if len(unacked) >= 10:
+                commit()
+        
+        def failed(item: Dict, stage: str, error: str):
+            status = work_queue.nack(item['url'], f"{stage}: {error}")
+            print(f"   [{item['idx']+1}] ❌ {stage.capitalize()} failed: {error}"
+                  + (f" ({status})" if status else ""))
+        
+        try:
+            while True:
+                batch = work_queue.claim(claim_size)
+                if not batch:
+                    break
+                print(f"Claimed {len(batch)} chapters ({work_queue.summary()})")
+                items = [
+                    {'idx': link['order_index'], 'link': link, 'url': link['url']}
+                    for link in batch
+                ]
+                # The queue retries failed chapters itself, across all workers
+                ChapterPipeline.from_config(
+                    self.site_config, fetch, write,
+                    session_factory=lambda: CloudflareBypass(self.site_config),
+                    fetch_workers=workers,
+                    on_failure=failed,
+                    retry_rounds=0
+                ).run(items)
+                commit()
+        finally:
+            commit()
+            released = work_queue.release()
+            if released:
+                print(f"Returned {released} unfinished chapters to the queue")
+    
     def fetch_chapters(
         self,
         links_file: Path,
         output_file: Path = None,
         checkpoint_file: Path = None,
         batch_size: int = None,
-        delay_min: float = None,
-        delay_max: float = None,
+        requests_per_minute: float = None,
         start_index: int = 0,
-        end_index: int = None
+        end_index: int = None,
+        workers: int = 1,
+        async_concurrency: int = None,
+        queue_file: Path = None
     ):
-        # Load links
-        with open(links_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        book_id = data.get('book_id', 'unknown')
-        links = data.get('links', [])
-        
-        if not links:
+        # Links are streamed and never held as a whole; book_id precedes the
+        # array in the surrounding object, so it is known once the first link is read
+        header = {}
+        links = iter_json_array(links_file, 'links', header)
+        first = next(links, None)
+        if first is None:
             raise SystemExit("No links found in input file")
+        links = itertools.chain([first], links)
+        book_id = header.get('book_id', 'unknown')
         
-        print(f"Loaded {len(links)} chapter links for book {book_id}")
+        print(f"Reading chapter links for book {book_id} from {links_file}")
         
         # Setup paths
         if not output_file:
@@ -118,101 +364,89 @@ class ChapterFetcher:
         else:
             checkpoint_file = Path(checkpoint_file)
         
-        # Load checkpoint
-        self.checkpoint_data = self._load_checkpoint(checkpoint_file)
+        # Load checkpoint (with a work queue, the queue tracks progress instead).
+        # Queue workers may share the database across machines, where WAL does not work
+        self._db_writer = OutputFormatter.open_sqlite_writer(
+            str(output_file.with_suffix('.db')), journal_mode='DELETE' if queue_file else 'WAL'
+        )
+        # Rows saved during the run use the export's compression, so an
+        # interrupted run still leaves a database CompressedContentReader can read
+        sqlite_config = self.site_config.get('sqlite', {})
+        self._db_codec = OutputFormatter.open_content_codec(
+            self._db_writer.conn, book_id,
+            compression=sqlite_config.get('compression'),
+            compression_level=sqlite_config.get('compression_level', 12)
+        )
+        if not queue_file:
+            self.checkpoint_data = self._load_checkpoint(checkpoint_file)
         completed_urls = set(self.checkpoint_data.get('completed_urls', []))
         
-        # Determine delays
-        if delay_min is None:
-            delay_min = self.site_config.get('rate_limit', {}).get('min', 3)
-        if delay_max is None:
-            delay_max = self.site_config.get('rate_limit', {}).get('max', 8)
+        # Request rate (applied by the fetch layer's shared rate limiter)
+        rate_config = self.site_config.setdefault('rate_limit', {})
+        if requests_per_minute:
+            # An explicit rate is kept fixed instead of adapting
+            rate_config.update(requests_per_minute=requests_per_minute, adaptive=False)
         
-        print(f"Using delays: {delay_min}-{delay_max}s between chapters")
+        if self.from_cache:
+            print("Replaying from HTML cache (no network, no delays)")
+        else:
+            limiter = RateLimiter.from_config(self.site_config)
+            print(f"Rate limit: {limiter.summary(self.site_config.get('base_url', ''))}"
+                  + (" (shared with other runs)" if limiter.state_file else ""))
         
         # Filter links
-        if end_index:
-            links = links[start_index:end_index]
-        else:
-            links = links[start_index:]
+        links = itertools.islice(links, start_index, end_index or None)
         
         if batch_size:
-            links = links[:batch_size]
-            print(f"Batch mode: processing {len(links)} chapters")
+            links = itertools.islice(links, batch_size)
+            print(f"Batch mode: processing up to {batch_size} chapters")
         
         # Download chapters
-        with CloudflareBypass(self.site_config) as cf:
-            for idx, link_info in enumerate(links, start=start_index):
-                url = link_info.get('url')
-                title = link_info.get('title', 'Unknown')
-                order_idx = link_info.get('order_index', idx)
-                
-                if not url:
-                    print(f"Skipping item {idx}: no URL")
-                    continue
-                
-                if url in completed_urls:
-                    print(f"[{idx+1}/{len(links)}] Skipping (already completed): {title}")
-                    continue
-                
-                print(f"\n[{idx+1}/{len(links)}] Fetching: {title}")
-                print(f"   URL: {url}")
-                
-                # Rate limiting
-                if idx > start_index:
-                    delay = random.uniform(delay_min, delay_max)
-                    print(f"   Waiting {delay:.1f}s...")
-                    time.sleep(delay)
-                
-                # Fetch chapter
-                html = cf.get(url, force_selenium=False)
-                if not html:
-                    print(f"   Failed to fetch, trying Selenium...")
-                    html = cf.get(url, force_selenium=True)
-                
-                if not html:
-                    print(f"   ❌ Failed to fetch chapter")
-                    # Save debug
-                    try:
-                        with open(f'scripts/debug_chapter_{idx}.html', 'w', encoding='utf-8') as f:
-                            f.write('')
-                    except:
-                        pass
-                    continue
+        if queue_file:
+            work_queue = WorkQueue.from_config(str(queue_file), self.site_config)
+            try:
+                added = work_queue.enqueue(
+                    dict(link_info, order_index=link_info.get('order_index', idx))
+                    for idx, link_info in enumerate(links, start=start_index)
+                )
+                print(f"Work queue {queue_file}: {added} chapters added ({work_queue.summary()})")
+                if workers > 1:
+                    print(f"Concurrent mode: {workers} workers")
+                self._fetch_from_queue(work_queue, book_id, max(1, workers or 1))
                 
-                # Parse content
-                try:
-                    parsed = self.parser.parse_chapter_content(html)
-                    chapter_data = {
-                        'url': url,
-                        'title': self.cleaner.normalize_title(parsed['title']) if parsed['title'] else title,
-                        'content': self.cleaner.clean_text(parsed['content']),
-                        'order_index': order_idx
-                    }
-                    
-                    # Add to checkpoint
-                    self.checkpoint_data['chapters'].append(chapter_data)
-                    self.checkpoint_data['completed_urls'].append(url)
-                    completed_urls.add(url)
-                    
-                    print(f"   ✓ Downloaded ({len(chapter_data['content'])} chars)")
-                    
-                    # Save checkpoint every chapter
-                    self._save_checkpoint(checkpoint_file)
-                    
-                    # Save output every 10 chapters
-                    if len(self.checkpoint_data['chapters']) % 10 == 0:
-                        self._save_output(output_file, book_id)
-                        
-                except Exception as e:
-                    print(f"   ❌ Parse error: {e}")
-                    continue
+                print(f"\n{'='*60}")
+                print(f"Queue drained for this worker: {work_queue.summary()}")
+                print(f"Chapters downloaded by this worker: {self.downloaded}")
+            finally:
+                work_queue.close()
+                # Rows from every worker share the database: no full re-export here
+                self._db_writer.close()
+            print(f"   Saved to {self._db_writer.path}")
+            print(f"{'='*60}")
+            return
+        
+        if async_concurrency:
+            print(f"Async mode: up to {async_concurrency} requests in flight")
+            asyncio.run(self._fetch_async(
+                links, start_index, completed_urls, output_file,
+                book_id, async_concurrency
+            ))
+        else:
+            workers = max(1, workers or 1)
+            if workers > 1:
+                print(f"Concurrent mode: {workers} workers")
+            self._fetch_pipelined(
+                links, start_index, completed_urls, output_file,
+                book_id, workers
+            )
         
         # Final save
         print(f"\n{'='*60}")
         print(f"Download complete!")
         print(f"Total chapters downloaded: {len(self.checkpoint_data['chapters'])}")
+        self._db_writer.close()
         self._save_output(output_file, book_id)
+        self._checkpoint_store.close()
         print(f"{'='*60}")
 
 
@@ -228,14 +462,26 @@ Examples:
   # Download in batches of 50 chapters at a time
   python fetch_chapters.py --links output/chapter_links_133485.json --batch-size 50
 
-  # Use custom delays (10-20 seconds between chapters)
-  python fetch_chapters.py --links output/chapter_links_133485.json --delay-min 10 --delay-max 20
+  # Slow down to 4 requests per minute (one every 15 seconds)
+  python fetch_chapters.py --links output/chapter_links_133485.json --rpm 4
 
   # Resume from checkpoint (automatic)
   python fetch_chapters.py --links output/chapter_links_133485.json
 
   # Download specific range
   python fetch_chapters.py --links output/chapter_links_133485.json --start 0 --end 100
+
+  # Download with 4 parallel sessions (all bounded by rate_limit.requests_per_minute)
+  python fetch_chapters.py --links output/chapter_links_133485.json --workers 4
+
+  # Download with up to 50 overlapping async requests (needs aiohttp)
+  python fetch_chapters.py --links output/chapter_links_133485.json --async 50
+
+  # Share the book between any number of processes (or machines on one file system)
+  python fetch_chapters.py --links output/chapter_links_133485.json --queue output/queue_133485.db
+
+  # Re-parse every chapter from the raw HTML cache (no network)
+  python fetch_chapters.py --links output/chapter_links_133485.json --from-cache --checkpoint /tmp/reparse.json
         """
     )
     
@@ -244,23 +490,47 @@ Examples:
     ap.add_argument('--checkpoint', help='Checkpoint file path')
     ap.add_argument('--config', default='config.yaml', help='Config YAML path')
     ap.add_argument('--batch-size', type=int, help='Number of chapters to download in this run')
-    ap.add_argument('--delay-min', type=float, help='Minimum delay between chapters (seconds)')
-    ap.add_argument('--delay-max', type=float, help='Maximum delay between chapters (seconds)')
+    ap.add_argument('--rpm', type=float,
+                    help='Fixed requests per minute per host (default: adaptive, from rate_limit)')
+    ap.add_argument('--delay-min', type=float,
+                    help='Deprecated: converted to --rpm from the mean of --delay-min/--delay-max')
+    ap.add_argument('--delay-max', type=float, help='Deprecated: see --delay-min')
     ap.add_argument('--start', type=int, default=0, help='Start index (0-based)')
     ap.add_argument('--end', type=int, help='End index (exclusive)')
+    ap.add_argument('--workers', type=int, default=1, help='Number of concurrent fetch sessions (default: 1)')
+    ap.add_argument('--async', dest='async_concurrency', type=int, metavar='N',
+                    help='Use the asyncio fetch path with up to N requests in flight')
+    ap.add_argument('--queue', metavar='PATH',
+                    help='Claim chapters from a shared SQLite work queue (created and filled from --links)')
+    ap.add_argument('--from-cache', action='store_true',
+                    help='Replay pages from the raw HTML cache only (no network)')
     
     args = ap.parse_args()
+    if args.queue and args.async_concurrency:
+        ap.error('--queue works with --workers, not --async')
+    if args.delay_min is not None or args.delay_max is not None:
+        delays = [d for d in (args.delay_min, args.delay_max) if d is not None]
+        mean_delay = sum(delays) / len(delays)
+        if args.rpm:
+            print("Warning: --delay-min/--delay-max are deprecated and ignored with --rpm")
+        elif mean_delay > 0:
+            args.rpm = 60 / mean_delay
+            print(f"Warning: --delay-min/--delay-max are deprecated, use --rpm {args.rpm:g} instead")
+        else:
+            print("Warning: --delay-min/--delay-max are deprecated and ignored")
     
-    fetcher = ChapterFetcher(config_path=args.config)
+    fetcher = ChapterFetcher(config_path=args.config, from_cache=args.from_cache)
     fetcher.fetch_chapters(
         links_file=Path(args.links),
         output_file=Path(args.output) if args.output else None,
         checkpoint_file=Path(args.checkpoint) if args.checkpoint else None,
         batch_size=args.batch_size,
-        delay_min=args.delay_min,
-        delay_max=args.delay_max,
+        requests_per_minute=args.rpm,
         start_index=args.start,
-        end_index=args.end
+        end_index=args.end,
+        workers=args.workers,
+        async_concurrency=args.async_concurrency,
+        queue_file=Path(args.queue) if args.queue else None
     )
 
 
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Re-extract stored chapters from the raw HTML cache after selector changes.
+
+Every chapter row in the database (optionally one book) is looked up in the
+HTML cache, parsed again with the current RanobesParser selectors and
+ContentCleaner, and written back through the batched SQLite writer. Pages are
+parsed in chunks across a process pool, so throughput scales with cores; the
+run ends with a pages/sec report. Books stored with compressed content are
+re-compressed with their existing dictionary.
+
+Usage:
+  python reparse.py --db output/chapters_133485.db
+  python reparse.py --db output/chapters_133485.db --book-id 133485 --workers 8
+  python reparse.py --db output/chapters_133485.db --dry-run --limit 500
+
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+from tqdm import tqdm
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.bulk_writer import SqliteBulkWriter
+from utils.content_codec import ContentCodec
+from utils.html_cache import HtmlCache
+from utils.pipeline import parse_stored_pages, parser_pool
+
+
+def load_targets(conn, book_id: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+    """Chapter rows to re-extract, in reading order"""
+    query = 'SELECT book_id, url, title FROM chapters WHERE url IS NOT NULL'
+    params = ()
+    if book_id:
+        query += ' AND book_id = ?'
+        params = (book_id,)
+    query += ' ORDER BY book_id, order_index'
+    if limit:
+        query += f' LIMIT {int(limit)}'
+    return [
+        {'book_id': row_book, 'url': url, 'title': title}
+        for row_book, url, title in conn.execute(query, params)
+    ]
+
+
+def reparse(db_path: Path, cache: HtmlCache, site_config: Dict, book_id: str = None,
+            workers: int = None, chunk_size: int = 32, batch_size: int = 500,
+            limit: int = None, dry_run: bool = False) -> Dict:
+    workers = workers or os.cpu_count() or 1
+    conn = sqlite3.connect(db_path)
+    writer = None
+    if not dry_run:
+        writer = SqliteBulkWriter(db_path, ('title', 'content', 'book_id', 'url'), chunk_size=batch_size)
+    stats = {'pages': 0, 'changed': 0, 'unchanged': 0, 'missing': 0, 'failed': 0}
+
+    try:
+        targets = load_targets(conn, book_id, limit)
+        pages = []
+        for idx, target in enumerate(targets):
+            path = cache.lookup(target['url'])
+            if path is None:
+                stats['missing'] += 1
+            else:
+                pages.append((idx, str(path)))
+        print(f"{len(targets)} chapters in {db_path}, {len(pages)} found in cache "
+              f"({stats['missing']} missing)")
+
+        codecs = {}
+        for target in targets:
+            if target['book_id'] not in codecs:
+                codecs[target['book_id']] = ContentCodec.load(conn, target['book_id'])
+
+        chunks = [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+        progress = tqdm(total=len(pages), desc="Re-parsing", unit="page")
+        start = time.perf_counter()
+
+        with parser_pool(site_config, workers) as pool:
+            # A few chunks per worker keep every core busy without holding
+            # every parsed chapter in memory
+            in_flight = set()
+            next_chunk = 0
+            while next_chunk < len(chunks) or in_flight:
+                while next_chunk < len(chunks) and len(in_flight) < workers * 2:
+                    in_flight.add(pool.submit(parse_stored_pages, chunks[next_chunk]))
+                    next_chunk += 1
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for idx, parsed, error in future.result():
+                        target = targets[idx]
+                        stats['pages'] += 1
+                        progress.update(1)
+                        if parsed is None or not parsed['content']:
+                            # Never replace stored text with an empty extraction
+                            stats['failed'] += 1
+                            tqdm.write(f"Warning: {target['url']}: {error or 'no content extracted'}")
+                            continue
+
+                        codec = codecs[target['book_id']]
+                        content = codec.compress(parsed['content']) if codec else parsed['content']
+                        current = conn.execute(
+                            'SELECT content FROM chapters WHERE book_id = ? AND url = ?',
+                            (target['book_id'], target['url'])
+                        ).fetchone()
+                        if current and current[0] == content:
+                            stats['unchanged'] += 1
+                            continue
+
+                        stats['changed'] += 1
+                        if writer is not None:
+                            writer.add({
+                                'title': parsed['normalized_title'] or target['title'],
+                                'content': content,
+                                'book_id': target['book_id'],
+                                'url': target['url'],
+                            })
+
+        if writer is not None:
+            writer.flush()
+        elapsed = time.perf_counter() - start
+        progress.close()
+    finally:
+        conn.close()
+        if writer is not None:
+            writer.close(optimize=stats['changed'] > 0)
+
+    rate = stats['pages'] / elapsed if elapsed > 0 else 0.0
+    print(f"✓ Re-parsed {stats['pages']} pages in {elapsed:.1f}s: {rate:.1f} pages/s "
+          f"with {workers} workers ({rate / workers:.1f} pages/s per worker)")
+    print(f"   {stats['changed']} changed, {stats['unchanged']} unchanged, "
+          f"{stats['failed']} failed, {stats['missing']} not cached"
+          + (" (dry run, nothing written)" if dry_run else ""))
+    stats['elapsed'] = elapsed
+    stats['pages_per_sec'] = rate
+    return stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Re-extract stored chapters from the HTML cache')
+    ap.add_argument('--db', required=True, help='Chapters database to update (scraper SQLite output)')
+    ap.add_argument('--book-id', help='Only re-parse this book')
+    ap.add_argument('--config', default='config.yaml', help='Config file (selectors and cache location)')
+    ap.add_argument('--cache-dir', help='HTML cache directory (default: cache.dir from the config)')
+    ap.add_argument('--workers', type=int, help='Parser processes (default: one per CPU)')
+    ap.add_argument('--chunk-size', type=int, default=32, help='Pages per task sent to a worker (default: 32)')
+    ap.add_argument('--limit', type=int, help='Only re-parse the first N chapters')
+    ap.add_argument('--dry-run', action='store_true', help='Parse and report without writing')
+    args = ap.parse_args()
+
+    with open(args.config, 'r') as f:
+        site_config = yaml.safe_load(f).get('ranobes.top', {})
+
+    cache_dir = Path(args.cache_dir or site_config.get('cache', {}).get('dir', 'output/html_cache'))
+    if not (cache_dir / 'index.db').exists():
+        raise SystemExit(f"No HTML cache found in {cache_dir} (enable cache in config.yaml and scrape first)")
+    if not Path(args.db).exists():
+        raise SystemExit(f"Database not found: {args.db}")
+
+    cache = HtmlCache(cache_dir, offline=True)
+    try:
+        reparse(
+            Path(args.db), cache, site_config,
+            book_id=args.book_id,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            batch_size=site_config.get('sqlite', {}).get('batch_size', 500),
+            limit=args.limit,
+            dry_run=args.dry_run
+        )
+    finally:
+        cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -8,16 +8,16 @@ It writes progress to a checkpoint file so you can resume collecting links later
 Usage:
   python scrape_links.py --book-id 133485
   python scrape_links.py --url "https://ranobes.top/novels/133485-lord-of-the-mysteries.html"
+  python scrape_links.py --book-id 133485 --browsers 3
 
 """
 
 import argparse
 import json
-import time
-import random
 from pathlib import Path
 from typing import List, Dict
 import sys
+from concurrent.futures import ThreadPoolExecutor
 import yaml
 
 # Make utils importable
@@ -26,6 +26,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 from utils.cloudflare_bypass import CloudflareBypass
 from utils.parser import RanobesParser
 from utils.checkpoint import CheckpointManager
+from utils.chapter_list import fetch_list_page
 
 
 def load_config(config_path: str = 'config.yaml') -> dict:
@@ -36,23 +37,18 @@ def load_config(config_path: str = 'config.yaml') -> dict:
         return yaml.safe_load(f)
 
 
-def rate_sleep(site_config: dict, multiplier: float = 1.0):
-    """Sleep with rate limiting. Use multiplier for longer waits between pages."""
-    rl = site_config.get('rate_limit', {})
-    mn = rl.get('min', 2) * multiplier
-    mx = rl.get('max', 5) * multiplier
-    delay = random.uniform(mn, mx)
-    print(f"   Waiting {delay:.1f}s before next request...")
-    time.sleep(delay)
-
-
 def collect_links(book_id: str, novel_url: str = None, config_path: str = 'config.yaml',
                   output_path: str = None, checkpoint_file: str = 'scripts/checkpoint_links.json',
-                  max_pages: int = None) -> List[Dict]:
+                  max_pages: int = None, browsers: int = None) -> List[Dict]:
     cfg = load_config(config_path)
     site_cfg = cfg.get('ranobes.top', {})
     parser = RanobesParser(site_cfg)
 
+    # List pages are rendered in parallel, one warm browser per render thread
+    if browsers:
+        site_cfg.setdefault('selenium', {})['pool_size'] = browsers
+    browsers = site_cfg.get('selenium', {}).get('pool_size', 1)
+
     if novel_url and not book_id:
         book_id = parser.extract_book_id_from_url(novel_url)
         if not book_id:
@@ -79,12 +75,14 @@ def collect_links(book_id: str, novel_url: str = None, config_path: str = 'confi
 
     # Use CloudflareBypass helper
     with CloudflareBypass(site_cfg) as cf:
-        # Fetch first page - FORCE SELENIUM because chapter list uses Vue.js
+        # Chapter data is embedded as window.__DATA__; Selenium only if it is missing
+        data_mode = site_cfg.get('list_data_mode', True)
         print(f"Fetching first page: {first_page_url}")
-        print("Note: This page uses JavaScript (Vue.js), forcing Selenium...")
-        html = cf.get(first_page_url, force_selenium=True)
+        html, first_chapters, mode = fetch_list_page(cf, parser, first_page_url, base_url,
+                                                     data_mode=data_mode)
         if not html:
-            raise SystemExit("Failed to fetch first chapter list page with Selenium")
+            raise SystemExit("Failed to fetch first chapter list page")
+        print(f"Chapter list mode: {mode}")
 
         total_pages = parser.detect_total_pages(html)
         print(f"Detected total pages: {total_pages}")
@@ -104,21 +102,30 @@ def collect_links(book_id: str, novel_url: str = None, config_path: str = 'confi
                     seen.add(url)
                     collected.append(ch)
 
+        pending_pages = []
         for page_num in range(1, total_pages + 1):
             if checkpoint.is_page_complete(page_num):
                 print(f"Skipping already completed page {page_num}")
                 continue
+            pending_pages.append(page_num)
 
+        def fetch_page(page_num: int):
             if page_num == 1:
-                page_html = html
-                page_url = first_page_url
-            else:
-                page_url = page_tpl.format(book_id=book_id, page=page_num)
-                # Use longer delays between pages (2-3x normal) to avoid rate limiting
-                rate_sleep(site_cfg, multiplier=2.5)
-                # Force Selenium for all chapter list pages (Vue.js rendering required)
-                print(f"Fetching page {page_num} with Selenium...")
-                page_html = cf.get(page_url, force_selenium=True)
+                return html, first_chapters
+            page_url = page_tpl.format(book_id=book_id, page=page_num)
+            print(f"Fetching page {page_num}...")
+            page_html, chapters, _ = fetch_list_page(cf, parser, page_url, base_url,
+                                                     data_mode=data_mode)
+            return page_html, chapters
+
+        if browsers > 1:
+            print(f"Rendering list pages with {browsers} browsers in parallel")
+        executor = ThreadPoolExecutor(max_workers=browsers)
+        # map() yields in page order, so order_index stays stable
+        fetched = executor.map(fetch_page, pending_pages)
+
+        for page_num, (page_html, chapters) in zip(pending_pages, fetched):
+            page_url = first_page_url if page_num == 1 else page_tpl.format(book_id=book_id, page=page_num)
 
             if not page_html:
                 print(f"Failed to fetch page {page_num}, saving debug HTML and continuing")
@@ -130,8 +137,6 @@ def collect_links(book_id: str, novel_url: str = None, config_path: str = 'confi
                 # Don't give up - continue to next page
                 continue
 
-            # Parse chapter links from page
-            chapters, _ = parser.parse_chapter_list(page_html, base_url)
             if not chapters:
                 print(f"No chapters found on page {page_num}, retrying once...")
                 # Save debug HTML
@@ -142,9 +147,10 @@ def collect_links(book_id: str, novel_url: str = None, config_path: str = 'confi
                 except Exception:
                     pass
                 
-                # Retry once with extra delay
-                print(f"   Retrying page {page_num} after longer wait...")
-                time.sleep(random.uniform(15, 25))
+                # An empty page usually means throttling: slow this host down,
+                # the retry then waits for its next (later) slot
+                cf.report_empty(page_url)
+                print(f"   Retrying page {page_num} at {cf.rate_limiter.current_rate(page_url):.1f} requests/min...")
                 retry_html = cf.get(page_url if page_num > 1 else first_page_url, force_selenium=True)
                 if retry_html:
                     chapters, _ = parser.parse_chapter_list(retry_html, base_url)
@@ -177,6 +183,9 @@ def collect_links(book_id: str, novel_url: str = None, config_path: str = 'confi
             except Exception as e:
                 print(f"Warning: could not write output file: {e}")
 
+        executor.shutdown(wait=True)
+        checkpoint.close()
+
         # Final write
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump({'book_id': book_id, 'links': collected}, f, ensure_ascii=False, indent=2)
@@ -193,11 +202,13 @@ def main():
     ap.add_argument('--output', type=str, help='Output JSON path')
     ap.add_argument('--checkpoint', type=str, default='scripts/checkpoint_links.json', help='Checkpoint file')
     ap.add_argument('--max-pages', type=int, help='Limit number of pages to scan (for testing)')
+    ap.add_argument('--browsers', type=int, help='Number of headless browsers rendering list pages in parallel')
 
     args = ap.parse_args()
 
     collect_links(book_id=args.book_id, novel_url=args.url, config_path=args.config,
-                  output_path=args.output, checkpoint_file=args.checkpoint, max_pages=args.max_pages)
+                  output_path=args.output, checkpoint_file=args.checkpoint, max_pages=args.max_pages,
+                  browsers=args.browsers)
 
 
 if __name__ == '__main__':
@@ -2,8 +2,6 @@
 
 import argparse
 import sys
-import time
-import random
 import yaml
 from pathlib import Path
 from tqdm import tqdm
@@ -16,16 +14,23 @@ from utils.parser import RanobesParser
 from utils.cleaner import ContentCleaner
 from utils.formatter import OutputFormatter
 from utils.checkpoint import CheckpointManager
+from utils.chapter_list import fetch_list_page
+from utils.updater import find_new_chapters
+from utils.pipeline import ChapterPipeline
 
 
 class RanobesScraper:
     """Main scraper class for ranobes.top"""
     
-    def __init__(self, config_path: str = "config.yaml"):
+    def __init__(self, config_path: str = "config.yaml", from_cache: bool = False):
         self.config = self._load_config(config_path)
         self.site_config = self.config.get('ranobes.top', {})
+        self.from_cache = from_cache
+        if from_cache:
+            # Replay pages from the raw HTML cache, never touch the network
+            self.site_config.setdefault('cache', {})['offline'] = True
         self.parser = RanobesParser(self.site_config)
-        self.cleaner = ContentCleaner()
+        self.cleaner = ContentCleaner(self.site_config)
         self.checkpoint = None
         
     def _load_config(self, config_path: str) -> dict:
@@ -38,14 +43,6 @@ class RanobesScraper:
         with open(config_file, 'r', encoding='utf-8') as f:
             return yaml.safe_load(f)
     
-    def _rate_limit(self):
-        """Apply rate limiting between requests"""
-        rate_config = self.site_config.get('rate_limit', {})
-        min_delay = rate_config.get('min', 2)
-        max_delay = rate_config.get('max', 5)
-        delay = random.uniform(min_delay, max_delay)
-        time.sleep(delay)
-    
     def scrape_book(
         self,
         book_id: str = None,
@@ -53,7 +50,8 @@ class RanobesScraper:
         output_format: str = 'json',
         output_path: str = None,
         resume: bool = False,
-        checkpoint_file: str = "checkpoint.json"
+        checkpoint_file: str = "checkpoint.json",
+        update: bool = False
     ):
         """
         Main scraping method
@@ -65,6 +63,7 @@ class RanobesScraper:
             output_path: Custom output path
             resume: Resume from checkpoint
             checkpoint_file: Path to checkpoint file
+            update: Only fetch chapters missing from the checkpoint
         """
         # Initialize checkpoint
         self.checkpoint = CheckpointManager(checkpoint_file)
@@ -82,7 +81,8 @@ class RanobesScraper:
         
         print(f"Starting scrape for book ID: {book_id}")
         print("\n⚠️  NOTE: ranobes.top uses JavaScript to load chapters.")
-        print("Selenium is REQUIRED for this scraper to work.")
+        print("Chapter lists are read from the embedded page data when possible;")
+        print("Selenium is REQUIRED as a fallback when that data is missing.")
         print("\nTo install Selenium:")
         print("  pip install selenium undetected-chromedriver")
         print("\nAnd ensure Chrome/Chromium is installed on your system.")
@@ -96,7 +96,10 @@ class RanobesScraper:
         # Initialize Cloudflare bypass
         with CloudflareBypass(self.site_config) as cf_bypass:
             # Step 1: Get chapter list
-            chapters_info = self._scrape_chapter_list(cf_bypass, book_id)
+            if update:
+                chapters_info = self._update_chapter_list(cf_bypass, book_id)
+            else:
+                chapters_info = self._scrape_chapter_list(cf_bypass, book_id)
             
             if not chapters_info:
                 print("\n❌ Error: No chapters found")
@@ -125,20 +128,48 @@ class RanobesScraper:
             }
             
             self._export_data(chapters_data, output_format, output_path, book_id, book_info)
+            self.checkpoint.close()
             
             print("\n✓ Scraping complete!")
             print(f"Total chapters scraped: {len(chapters_data)}")
     
+    def _update_chapter_list(self, cf_bypass: CloudflareBypass, book_id: str) -> list:
+        """Chapter list from the checkpoint plus entries published since, without a full crawl"""
+        known = self.checkpoint.get_chapters()
+        if not known:
+            print("No chapters in checkpoint, falling back to a full chapter list scan")
+            return self._scrape_chapter_list(cf_bypass, book_id)
+        
+        # Checkpointed order_index values are stale after an earlier update
+        order = {url: idx for idx, url in enumerate(self.checkpoint.get_metadata('chapter_order', []))}
+        if order:
+            known = [dict(ch, order_index=order.get(ch['url'], len(order) + ch.get('order_index', 0)))
+                     for ch in known]
+        
+        chapters, new_chapters = find_new_chapters(
+            cf_bypass, self.parser, self.site_config, book_id, known
+        )
+        self.checkpoint.set_metadata('chapter_order', [ch['url'] for ch in chapters])
+        for chapter in new_chapters:
+            print(f"  New: {chapter.get('title') or chapter['url']}")
+        return chapters
+    
     def _scrape_chapter_list(self, cf_bypass: CloudflareBypass, book_id: str) -> list:
         """Scrape all chapter links from paginated list"""
         base_url = self.site_config.get('base_url', 'https://ranobes.top')
         first_page_url = self.site_config.get('chapters_url_first', '').format(book_id=book_id)
         
+        data_mode = self.site_config.get('list_data_mode', True)
+        
         print(f"\nFetching chapter list from: {first_page_url}")
-        print("Note: This page uses JavaScript (Vue.js), using Selenium...")
+        if data_mode:
+            print("Reading chapter data embedded in the page (Selenium only if missing)...")
+        else:
+            print("Note: This page uses JavaScript (Vue.js), using Selenium...")
         
-        # Get first page - FORCE SELENIUM for JavaScript-rendered content
-        html = cf_bypass.get(first_page_url, force_selenium=True)
+        html, first_chapters, mode = fetch_list_page(
+            cf_bypass, self.parser, first_page_url, base_url, data_mode=data_mode
+        )
         if not html:
             print("Error: Failed to fetch chapter list")
             return []
@@ -158,13 +189,15 @@ class RanobesScraper:
             if page_num == 1:
                 page_url = first_page_url
                 page_html = html  # Already fetched
+                chapters = first_chapters
             else:
                 page_url = self.site_config.get('chapters_url', '').format(
                     book_id=book_id,
                     page=page_num
                 )
-                self._rate_limit()
-                page_html = cf_bypass.get(page_url, force_selenium=True)
+                page_html, chapters, mode = fetch_list_page(
+                    cf_bypass, self.parser, page_url, base_url, data_mode=data_mode
+                )
             
             if not page_html:
                 print(f"Warning: Failed to fetch page {page_num}")
@@ -180,8 +213,6 @@ class RanobesScraper:
                 except Exception as e:
                     print(f"  Debug: Failed to save HTML: {e}")
             
-            chapters, _ = self.parser.parse_chapter_list(page_html, base_url)
-            
             if not chapters:
                 print(f"Warning: No chapters found on page {page_num}")
                 # Save HTML for debugging
@@ -212,40 +243,48 @@ class RanobesScraper:
     def _scrape_chapters(self, cf_bypass: CloudflareBypass, chapters_info: list) -> list:
         """Scrape content from individual chapters"""
         chapters_data = []
+        pending = []
         
         print(f"\nScraping chapter content...")
         
-        for chapter_info in tqdm(chapters_info, desc="Chapters"):
-            url = chapter_info['url']
-            
+        for chapter_info in chapters_info:
             # Check if already in checkpoint
-            existing_chapters = self.checkpoint.get_chapters()
-            existing = next((ch for ch in existing_chapters if ch.get('url') == url), None)
+            existing = self.checkpoint.get_chapter_by_url(chapter_info['url'])
             
             if existing and existing.get('content'):
-                chapters_data.append(existing)
-                continue
-            
-            # Scrape chapter
-            self._rate_limit()
-            html = cf_bypass.get(url)
-            
-            if not html:
-                print(f"\nWarning: Failed to scrape chapter: {chapter_info.get('title', url)}")
-                continue
-            
-            parsed = self.parser.parse_chapter_content(html)
-            
+                # Position may have shifted if new chapters were listed before it
+                chapters_data.append(dict(existing, order_index=chapter_info['order_index']))
+            else:
+                pending.append(chapter_info)
+        
+        progress = tqdm(total=len(chapters_info), initial=len(chapters_data), desc="Chapters")
+        
+        def fetch(_session, chapter_info: dict):
+            return cf_bypass.get(chapter_info['url'])
+        
+        def write(chapter_info: dict, parsed: dict):
             chapter_data = {
-                'url': url,
-                'title': self.cleaner.normalize_title(parsed['title']),
-                'content': self.cleaner.clean_text(parsed['content']),
+                'url': chapter_info['url'],
+                'title': parsed['normalized_title'],
+                'content': parsed['content'],
                 'order_index': chapter_info['order_index']
             }
-            
             chapters_data.append(chapter_data)
             self.checkpoint.add_chapter(chapter_data)
+            progress.update(1)
+        
+        def failed(chapter_info: dict, stage: str, error: str):
+            print(f"\nWarning: Failed to scrape chapter ({stage}): {chapter_info.get('title', chapter_info['url'])}: {error}")
+            progress.update(1)
         
+        try:
+            # Parsing runs in worker processes while the next chapter downloads
+            ChapterPipeline.from_config(self.site_config, fetch, write, on_failure=failed).run(pending)
+        finally:
+            progress.close()
+        
+        # Results arrive in completion order
+        chapters_data.sort(key=lambda ch: ch.get('order_index', 0))
         return chapters_data
     
     def _export_data(
@@ -259,12 +298,22 @@ class RanobesScraper:
         """Export scraped data in specified format(s)"""
         print(f"\nExporting to {output_format} format...")
         
+        sqlite_config = self.site_config.get('sqlite', {})
+        
         if output_format == 'all':
-            OutputFormatter.export_all(chapters, output_path, book_id, book_info)
+            OutputFormatter.export_all(
+                chapters, output_path, book_id, book_info,
+                compression=sqlite_config.get('compression'),
+                compression_level=sqlite_config.get('compression_level', 12)
+            )
         elif output_format == 'json':
             OutputFormatter.export_json(chapters, output_path + '.json', book_info)
         elif output_format == 'sqlite':
-            OutputFormatter.export_sqlite(chapters, output_path + '.db', book_id)
+            OutputFormatter.export_sqlite(
+                chapters, output_path + '.db', book_id,
+                compression=sqlite_config.get('compression'),
+                compression_level=sqlite_config.get('compression_level', 12)
+            )
         elif output_format == 'txt':
             OutputFormatter.export_txt(chapters, output_path + '.txt', book_info)
         else:
@@ -286,8 +335,14 @@ Examples:
   # Resume from checkpoint
   python scraper.py --resume checkpoint.json
 
+  # Fetch only chapters published since the last run
+  python scraper.py --resume checkpoint.json --update --format sqlite
+
   # Export to all formats
   python scraper.py --book-id 133485 --format all --output output/lotm
+
+  # Re-parse from the raw HTML cache without network access
+  python scraper.py --book-id 133485 --from-cache
         """
     )
     
@@ -338,6 +393,18 @@ Examples:
         help='Config file path (default: config.yaml)'
     )
     
+    parser.add_argument(
+        '--update',
+        action='store_true',
+        help='Only fetch chapters published since the checkpointed run'
+    )
+    
+    parser.add_argument(
+        '--from-cache',
+        action='store_true',
+        help='Replay pages from the raw HTML cache only (no network requests)'
+    )
+    
     args = parser.parse_args()
     
     # Validate arguments
@@ -345,7 +412,7 @@ Examples:
         parser.error("Either --book-id, --url, or --resume is required")
     
     # Initialize scraper
-    scraper = RanobesScraper(config_path=args.config)
+    scraper = RanobesScraper(config_path=args.config, from_cache=args.from_cache)
     
     # Resume mode
     if args.resume:
@@ -360,7 +427,8 @@ Examples:
             output_format=args.format,
             output_path=args.output,
             resume=True,
-            checkpoint_file=args.resume
+            checkpoint_file=args.resume,
+            update=args.update
         )
     else:
         scraper.scrape_book(
@@ -369,7 +437,8 @@ Examples:
             output_format=args.format,
             output_path=args.output,
             resume=False,
-            checkpoint_file=args.checkpoint
+            checkpoint_file=args.checkpoint,
+            update=args.update
         )
 
 
@@ -0,0 +1,254 @@
+import asyncio
+import contextvars
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
+
+from .cloudflare_bypass import CloudflareBypass
+from .session_bridge import SessionBridge
+from .html_cache import HtmlCache
+from .rate_limiter import RateLimiter, retry_after_seconds
+from .circuit_breaker import (
+    CHALLENGE, CIRCUIT_OPEN, EMPTY, HTTP_4XX, HTTP_5XX, OUTAGE_KINDS, RATE_LIMITED, CircuitBreaker,
+    classify_exception, classify_response
+)
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Concurrent fetches run as separate tasks, each sees its own last failure
+_last_failure: contextvars.ContextVar = contextvars.ContextVar('last_failure', default=None)
+
+
+class AsyncCloudflareBypass:
+    """
+    Non-blocking counterpart of CloudflareBypass.get
+
+    Plain requests go through a pooled keep-alive aiohttp session, limited by a
+    semaphore. Challenged responses (403/503) and forced-Selenium fetches are
+    handed to a regular CloudflareBypass running in a single-thread executor.
+    Failures are classified and fed to the same per-host circuit breaker as
+    CloudflareBypass, and a 4xx answer is not retried.
+    """
+
+    def __init__(self, config: Dict[str, Any], concurrency: int = None):
+        self.config = config
+        retry_config = config.get('retry', {})
+        self.timeout = retry_config.get('timeout', 30)
+        self.max_retries = retry_config.get('max_attempts', 3)
+        self.backoff_factor = retry_config.get('backoff_factor', 2)
+        self.concurrency = concurrency or config.get('async', {}).get('concurrency', 8)
+        # Same buckets as the CloudflareBypass fallback and any other fetchers
+        self.rate_limiter = RateLimiter.from_config(config)
+        # Shared with the fallback and every other fetcher in this process; None if disabled
+        self.breaker = CircuitBreaker.from_config(config)
+
+        self.session = None
+        self.method = None
+        self._semaphore = None
+        self._fallback = None
+        self.session_bridge = SessionBridge(config.get('session', {}).get('cookie_file'))
+        self.cache = HtmlCache.from_config(config)
+        # One thread: a Selenium driver must not be shared between threads
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def _get_random_user_agent(self) -> str:
+        """Get random user agent from config"""
+        user_agents = self.config.get('user_agents', [])
+        if user_agents:
+            return random.choice(user_agents)
+        return 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+    async def _get_session(self):
+        """Create the pooled keep-alive session on first use"""
+        if self.session is None:
+            if not AIOHTTP_AVAILABLE:
+                raise RuntimeError("aiohttp is required for async fetching: pip install aiohttp")
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self.session
+
+    async def _pace(self, url: str):
+        """Wait for the host's next request slot from the shared rate limiter"""
+        wait = self.rate_limiter.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    @property
+    def last_failure(self) -> Optional[str]:
+        """Failure kind behind the calling task's last fetch() that returned None"""
+        return _last_failure.get()
+
+    def _circuit_closed(self, url: str) -> bool:
+        if self.breaker is None or self.breaker.allows(url):
+            return True
+        print(f"   Giving up on {url} for now (circuit open)")
+        _last_failure.set(CIRCUIT_OPEN)
+        return False
+
+    def _record_success(self, url: str):
+        _last_failure.set(None)
+        if self.breaker is not None:
+            self.breaker.record_success(url)
+
+    def _record_failure(self, url: str, kind: str):
+        _last_failure.set(kind)
+        if self.breaker is not None:
+            self.breaker.record_failure(url, kind)
+
+    def report_empty(self, url: str):
+        """Nothing could be parsed from url's page, usually a sign of throttling"""
+        self.rate_limiter.backoff(url, 'empty parse')
+
+    async def _fallback_get(self, url: str, force_selenium: bool) -> Optional[str]:
+        """Run the blocking CloudflareBypass in the executor"""
+        if self._fallback is None:
+            # Caching happens here, not again inside the fallback
+            self._fallback = CloudflareBypass({**self.config, 'cache': {}})
+            # Clearance solved by the fallback becomes visible to aiohttp requests
+            self._fallback.session_bridge = self.session_bridge
+        loop = asyncio.get_running_loop()
+        html, kind = await loop.run_in_executor(
+            self._executor,
+            lambda: (self._fallback.get(url, force_selenium=force_selenium), self._fallback.last_failure)
+        )
+        self.method = self._fallback.method
+        _last_failure.set(kind)
+        return html
+
+    async def fetch(self, url: str, max_retries: int = None, force_selenium: bool = False) -> Optional[str]:
+        """
+        Fetch URL without blocking the event loop
+        Returns HTML content or None on failure
+
+        Args:
+            url: URL to fetch
+            max_retries: Number of retry attempts
+            force_selenium: Force use of Selenium (for JavaScript-rendered pages)
+        """
+        if max_retries is None:
+            max_retries = self.max_retries
+
+        _last_failure.set(None)
+        if self.cache is not None:
+            cache_key = f'selenium:{url}' if force_selenium else url
+            html = self.cache.get(cache_key)
+            if html is not None:
+                self.method = 'cache'
+                return html
+            if self.cache.offline:
+                print(f"Cache miss (offline mode): {url}")
+                return None
+
+        html = await self._fetch(url, max_retries, force_selenium)
+        if html and self.cache is not None:
+            self.cache.put(cache_key, html)
+        return html
+
+    async def _fetch(self, url: str, max_retries: int, force_selenium: bool) -> Optional[str]:
+        """Fetch URL from the network, falling back to CloudflareBypass"""
+        session = await self._get_session()
+
+        async with self._semaphore:
+            if force_selenium:
+                return await self._fallback_get(url, force_selenium=True)
+
+            # While the host's circuit is open every fetch waits here (off the event loop)
+            if self.breaker is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self.breaker.before_request, url)
+
+            for attempt in range(max_retries):
+                # The host went down meanwhile: leave this URL to the caller
+                if attempt and not self._circuit_closed(url):
+                    return None
+
+                try:
+                    await self._pace(url)
+                    self.method = 'aiohttp'
+                    headers = {'User-Agent': self._get_random_user_agent()}
+                    clearance = self.session_bridge.get(url)
+                    if clearance:
+                        headers['User-Agent'] = clearance['user_agent']
+                        headers['Cookie'] = '; '.join(
+                            f"{c['name']}={c['value']}" for c in clearance['cookies']
+                        )
+                    async with session.get(url, headers=headers) as response:
+                        status_code = response.status
+                        text = await response.text()
+                        retry_after = response.headers.get('Retry-After')
+
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    kind = classify_exception(e)
+                    self._record_failure(url, kind)
+                    print(f"Attempt {attempt + 1}/{max_retries} failed for {url} ({kind}): {e!r}")
+
+                    if attempt < max_retries - 1:
+                        wait_time = self.backoff_factor ** attempt
+                        await asyncio.sleep(wait_time)
+                    elif kind not in OUTAGE_KINDS:
+                        # A browser does not help when the host is unreachable
+                        return await self._fallback_get(url, force_selenium=False)
+                    continue
+
+                kind = classify_response(status_code, text)
+                if kind is None:
+                    self.rate_limiter.success(url)
+                    self._record_success(url)
+                    return text
+
+                self._record_failure(url, kind)
+                status = 'challenge page' if status_code == 200 else f"HTTP {status_code}"
+
+                if kind == HTTP_4XX:
+                    # Missing or forbidden page: retrying will not change the answer
+                    print(f"   {url}: {status}, not retrying")
+                    return None
+
+                # The site is pushing back: slow this host down before any retry
+                if kind in (CHALLENGE, RATE_LIMITED, HTTP_5XX, EMPTY):
+                    self.rate_limiter.backoff(
+                        url, status if kind != EMPTY else 'empty response',
+                        retry_after=retry_after_seconds(retry_after)
+                    )
+
+                if kind == CHALLENGE:
+                    if clearance:
+                        self.session_bridge.invalidate(url)
+                    # Cloudflare challenge, let cloudscraper/Selenium handle it
+                    print(f"aiohttp got {status}, falling back to CloudflareBypass...")
+                    return await self._fallback_get(url, force_selenium=False)
+
+        return None
+
+    async def fetch_many(self, urls: List[str], force_selenium: bool = False) -> List[Optional[str]]:
+        """Fetch several URLs concurrently, preserving input order"""
+        return await asyncio.gather(*[
+            self.fetch(url, force_selenium=force_selenium) for url in urls
+        ])
+
+    async def close(self):
+        """Clean up resources"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        if self._fallback is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._fallback.close)
+            self._fallback = None
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+
+class BrowserPool:
+    """
+    Pool of warm headless browsers leased to callers
+
+    Drivers are launched up front, handed out one caller at a time, checked
+    before every lease and recycled after max_pages page loads or when a
+    caller reports a crash. Thread-safe, so several threads can render
+    pages in parallel.
+    """
+
+    def __init__(self, factory: Callable[[], Optional[Any]], size: int = 1, max_pages: int = 50):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._drivers = {}  # id(driver) -> driver
+        self._pages = {}  # id(driver) -> pages served
+        self._launching = 0
+        self._closed = False
+
+    def start(self) -> int:
+        """Pre-launch drivers up to pool size, returns number of live drivers"""
+        while True:
+            with self._lock:
+                if self._closed or len(self._drivers) + self._launching >= self.size:
+                    return len(self._drivers)
+            driver = self._launch()
+            if driver is None:
+                return len(self._drivers)
+            self._idle.put(driver)
+
+    def _launch(self) -> Optional[Any]:
+        """Start a new driver and register it with the pool"""
+        with self._lock:
+            self._launching += 1
+        try:
+            driver = self.factory()
+        finally:
+            with self._lock:
+                self._launching -= 1
+        if driver is not None:
+            with self._lock:
+                self._drivers[id(driver)] = driver
+                self._pages[id(driver)] = 0
+        return driver
+
+    def _is_healthy(self, driver: Any) -> bool:
+        """Check the browser still responds"""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver: Any):
+        """Quit a driver and forget about it"""
+        with self._lock:
+            self._drivers.pop(id(driver), None)
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def acquire(self, timeout: float = None) -> Optional[Any]:
+        """Lease a healthy driver, launching one if the pool has room"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self._closed:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    has_room = len(self._drivers) + self._launching < self.size
+                if has_room:
+                    driver = self._launch()
+                    if driver is None:
+                        return None
+                else:
+                    # Poll so a slot freed by a recycled driver is noticed
+                    wait = 0.5
+                    if deadline is not None:
+                        wait = min(wait, deadline - time.monotonic())
+                        if wait <= 0:
+                            return None
+                    try:
+                        driver = self._idle.get(timeout=wait)
+                    except queue.Empty:
+                        continue
+
+            if self._is_healthy(driver):
+                return driver
+
+            print("   ⚠ Browser stopped responding, replacing it...")
+            self._discard(driver)
+
+        return None
+
+    def release(self, driver: Any, broken: bool = False):
+        """Return a leased driver, recycling it if it crashed or is worn out"""
+        if driver is None:
+            return
+
+        with self._lock:
+            pages = self._pages.get(id(driver))
+            if pages is not None:
+                pages += 1
+                self._pages[id(driver)] = pages
+
+        if self._closed or broken or pages is None or pages >= self.max_pages:
+            # The freed slot is refilled by the next acquire()
+            self._discard(driver)
+            return
+
+        self._idle.put(driver)
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """Context manager around acquire/release, recycling the driver on error"""
+        driver = self.acquire(timeout=timeout)
+        try:
+            yield driver
+        except Exception:
+            self.release(driver, broken=True)
+            raise
+        else:
+            self.release(driver)
+
+    def close(self):
+        """Quit every driver, including ones still leased"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        with self._lock:
+            drivers = list(self._drivers.values())
+            self._drivers.clear()
+            self._pages.clear()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
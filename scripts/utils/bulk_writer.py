@@ -0,0 +1,128 @@
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence
+
+
+class SqliteBulkWriter:
+    """
+    Batched upsert writer for chapter tables
+    
+    Rows are buffered and written with executemany, one transaction per
+    chunk, so a build costs one sync per chunk instead of one per row. The
+    database runs in WAL mode with synchronous=NORMAL while writing (or
+    journal_mode='DELETE' for a file shared across machines, where WAL's
+    shared memory does not work); flush()
+    only writes rows added since the previous flush, so periodic saves stay
+    cheap. close(optimize=True) runs ANALYZE and VACUUM and switches the file
+    back to a single rollback-journal database for shipping.
+    
+    Rows are matched on key columns: existing rows are updated in place (ids
+    stay stable), others are inserted.
+    """
+    
+    def __init__(self, path: str, columns: Sequence[str], table: str = 'chapters',
+                 key: Sequence[str] = ('book_id', 'url'), chunk_size: int = 500,
+                 create_sql: str = None, journal_mode: str = 'WAL', busy_timeout: float = 30):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self.columns = list(columns)
+        self.key = list(key)
+        self.chunk_size = chunk_size
+        self.inserted = 0
+        self.updated = 0
+        self._pending: List[Dict] = []
+        
+        self.conn = sqlite3.connect(self.path, timeout=busy_timeout, check_same_thread=False)
+        self.conn.execute(f'PRAGMA journal_mode={journal_mode}')
+        # NORMAL is only crash-safe with WAL
+        self.conn.execute('PRAGMA synchronous=NORMAL' if journal_mode.upper() == 'WAL' else 'PRAGMA synchronous=FULL')
+        if create_sql:
+            self.conn.execute(create_sql)
+        # Upserts look rows up by key
+        self.conn.execute(
+            f'CREATE INDEX IF NOT EXISTS idx_{table}_{"_".join(self.key)} '
+            f'ON {table}({", ".join(self.key)})'
+        )
+        self.conn.commit()
+        
+        values = [c for c in self.columns if c not in self.key]
+        key_match = ' AND '.join(f'{c} = ?' for c in self.key)
+        self._update_sql = (
+            f'UPDATE {table} SET {", ".join(f"{c} = ?" for c in values)} WHERE {key_match}'
+        )
+        self._update_cols = values + self.key
+        self._insert_sql = (
+            f'INSERT INTO {table} ({", ".join(self.columns)}) '
+            f'SELECT {", ".join("?" for _ in self.columns)} '
+            f'WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {key_match})'
+        )
+        self._insert_cols = self.columns + self.key
+    
+    def add(self, row: Dict) -> int:
+        """Buffer one row, returns the number of rows written if this filled a chunk"""
+        self._pending.append(row)
+        if len(self._pending) >= self.chunk_size:
+            return self.flush()
+        return 0
+    
+    def add_many(self, rows: Iterable[Dict]) -> int:
+        written = 0
+        for row in rows:
+            written += self.add(row)
+        return written
+    
+    def flush(self) -> int:
+        """Write rows added since the last flush in one transaction"""
+        if not self._pending:
+            return 0
+        rows, self._pending = self._pending, []
+        
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                self._update_sql, [tuple(row.get(c) for c in self._update_cols) for row in rows]
+            )
+            updated = self.conn.total_changes - before
+            # Rows just updated match the NOT EXISTS guard and are skipped
+            self.conn.executemany(
+                self._insert_sql, [tuple(row.get(c) for c in self._insert_cols) for row in rows]
+            )
+            self.inserted += self.conn.total_changes - before - updated
+            self.updated += updated
+        return len(rows)
+    
+    def prune(self, book_id: str, keep_urls: Iterable[str]) -> int:
+        """Delete this book's rows whose URL is not in keep_urls, returns rows removed"""
+        self.flush()
+        with self.conn:
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS keep_urls (url TEXT PRIMARY KEY)')
+            self.conn.execute('DELETE FROM keep_urls')
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO keep_urls (url) VALUES (?)',
+                ((url,) for url in keep_urls if url)
+            )
+            cursor = self.conn.execute(f'''
+                DELETE FROM {self.table}
+                WHERE book_id = ? AND (url IS NULL OR url NOT IN (SELECT url FROM keep_urls))
+            ''', (book_id,))
+            removed = cursor.rowcount
+            self.conn.execute('DROP TABLE keep_urls')
+        return removed
+    
+    def close(self, optimize: bool = False):
+        """Flush remaining rows; optionally ANALYZE and VACUUM the finished file"""
+        try:
+            self.flush()
+            if optimize:
+                self.conn.execute('ANALYZE')
+                self.conn.execute('PRAGMA journal_mode=DELETE')
+                self.conn.execute('VACUUM')
+        finally:
+            self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(optimize=exc_type is None)
@@ -0,0 +1,31 @@
+from typing import Dict, List, Optional, Tuple
+
+from .cloudflare_bypass import CloudflareBypass
+from .parser import RanobesParser
+
+
+def fetch_list_page(cf: CloudflareBypass, parser: RanobesParser, url: str, base_url: str,
+                    data_mode: bool = True) -> Tuple[Optional[str], List[Dict], str]:
+    """
+    Fetch one chapter list page, preferring the embedded window.__DATA__ JSON
+    over browser rendering
+
+    Data mode fetches the page over plain HTTP and reads the chapter array
+    straight from the JSON. Selenium is only used when that JSON is missing.
+
+    Returns: (html, chapters, mode) where mode is 'data' or 'selenium'
+    """
+    if data_mode:
+        html = cf.get(url)
+        if html:
+            chapters = parser.parse_chapter_list_data(html, base_url)
+            if chapters:
+                return html, chapters, 'data'
+        print("   No embedded chapter data, falling back to Selenium...")
+
+    html = cf.get(url, force_selenium=True)
+    if not html:
+        return None, [], 'selenium'
+
+    chapters, _ = parser.parse_chapter_list(html, base_url)
+    return html, chapters, 'selenium'
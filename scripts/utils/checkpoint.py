@@ -1,24 +1,24 @@
-import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 from pathlib import Path
 
+from .journal import JournaledStore
+
 
 class CheckpointManager:
     """Manage scraping progress checkpoints"""
     
-    def __init__(self, checkpoint_file: str = "checkpoint.json"):
+    def __init__(self, checkpoint_file: str = "checkpoint.json", compact_every: int = 500):
         self.checkpoint_file = Path(checkpoint_file)
-        self.data = self._load()
-    
-    def _load(self) -> Dict:
-        """Load checkpoint from file"""
-        if self.checkpoint_file.exists():
-            try:
-                with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Warning: Could not load checkpoint: {e}")
-        
+        # Hash indexes over data['chapters'] / data['completed_pages']
+        self._chapters_by_url: Dict[str, Dict] = {}
+        self._pages: Set[int] = set()
+        self._store = JournaledStore(
+            self.checkpoint_file, self._apply, self._empty, compact_every=compact_every
+        )
+        self._rebuild_index()
+    
+    @staticmethod
+    def _empty() -> Dict:
         return {
             'book_id': None,
             'completed_pages': [],
@@ -27,12 +27,44 @@ class CheckpointManager:
             'metadata': {}
         }
     
+    def _apply(self, data: Dict, record: Dict):
+        """Apply one journal record to checkpoint data and the indexes"""
+        op = record.get('op')
+        if op == 'page':
+            if record['page'] not in self._pages:
+                data['completed_pages'].append(record['page'])
+                self._pages.add(record['page'])
+        elif op == 'chapter':
+            chapter = record['chapter']
+            if chapter.get('url') not in self._chapters_by_url:
+                data['chapters'].append(chapter)
+                data['completed_chapters'].append(chapter.get('url'))
+                self._chapters_by_url[chapter.get('url')] = chapter
+        elif op == 'metadata':
+            data['metadata'][record['key']] = record['value']
+    
+    def _rebuild_index(self):
+        """Rebuild hash indexes from the loaded data"""
+        self._chapters_by_url = {ch.get('url'): ch for ch in self.data['chapters']}
+        # completed_chapters may list URLs whose chapter dict was not stored
+        for url in self.data['completed_chapters']:
+            self._chapters_by_url.setdefault(url, None)
+        self._pages = set(self.data['completed_pages'])
+    
+    @property
+    def data(self) -> Dict:
+        return self._store.data
+    
     def save(self):
-        """Save checkpoint to file"""
+        """Save checkpoint to file (compacts the journal into the snapshot)"""
+        try:
+            self._store.compact()
+        except Exception as e:
+            print(f"Warning: Could not save checkpoint: {e}")
+    
+    def _append(self, record: Dict):
         try:
-            self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            self._store.append(record)
         except Exception as e:
             print(f"Warning: Could not save checkpoint: {e}")
     
@@ -40,54 +72,51 @@ class CheckpointManager:
         """Set current book ID"""
         if self.data['book_id'] != book_id:
             # New book, reset progress
-            self.data = {
-                'book_id': book_id,
-                'completed_pages': [],
-                'completed_chapters': [],
-                'chapters': [],
-                'metadata': {}
-            }
-        self.save()
+            data = self._empty()
+            data['book_id'] = book_id
+            self._store.reset(data)
+            self._rebuild_index()
     
     def mark_page_complete(self, page_number: int):
         """Mark a page as completed"""
-        if page_number not in self.data['completed_pages']:
-            self.data['completed_pages'].append(page_number)
-        self.save()
+        if page_number not in self._pages:
+            self._append({'op': 'page', 'page': page_number})
     
     def is_page_complete(self, page_number: int) -> bool:
         """Check if page was already scraped"""
-        return page_number in self.data['completed_pages']
+        return page_number in self._pages
     
     def add_chapter(self, chapter: Dict):
         """Add scraped chapter to checkpoint"""
         chapter_url = chapter.get('url')
-        if chapter_url not in self.data['completed_chapters']:
-            self.data['chapters'].append(chapter)
-            self.data['completed_chapters'].append(chapter_url)
-        self.save()
+        if chapter_url not in self._chapters_by_url:
+            self._append({'op': 'chapter', 'chapter': chapter})
     
     def get_chapters(self) -> List[Dict]:
         """Get all scraped chapters"""
         return self.data['chapters']
     
+    def get_chapter_by_url(self, url: str) -> Optional[Dict]:
+        """Look up a checkpointed chapter by URL"""
+        return self._chapters_by_url.get(url)
+    
+    def has_chapter(self, url: str) -> bool:
+        """Check if a chapter URL was already checkpointed"""
+        return url in self._chapters_by_url
+    
     def set_metadata(self, key: str, value):
         """Store metadata"""
-        self.data['metadata'][key] = value
-        self.save()
+        self._append({'op': 'metadata', 'key': key, 'value': value})
     
     def get_metadata(self, key: str, default=None):
         """Retrieve metadata"""
         return self.data['metadata'].get(key, default)
     
+    def close(self):
+        """Fold outstanding journal records into the snapshot"""
+        self._store.close()
+    
     def clear(self):
         """Clear checkpoint"""
-        self.data = {
-            'book_id': None,
-            'completed_pages': [],
-            'completed_chapters': [],
-            'chapters': [],
-            'metadata': {}
-        }
-        if self.checkpoint_file.exists():
-            self.checkpoint_file.unlink()
+        self._store.delete()
+        self._rebuild_index()
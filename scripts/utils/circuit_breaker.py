@@ -0,0 +1,181 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from .readiness import challenge_page
+
+# Failure kinds
+DNS = 'dns'
+TIMEOUT = 'timeout'
+CONNECTION = 'connection'
+HTTP_4XX = 'http_4xx'
+HTTP_5XX = 'http_5xx'
+RATE_LIMITED = 'rate_limited'
+CHALLENGE = 'challenge'
+EMPTY = 'empty'
+ERROR = 'error'
+# Not a response at all: the URL was given up because its host's circuit is open
+CIRCUIT_OPEN = 'circuit_open'
+
+# Kinds that say the host (not the page) is in trouble; these trip the breaker
+OUTAGE_KINDS = {DNS, TIMEOUT, CONNECTION, HTTP_5XX, RATE_LIMITED}
+
+_DNS_MARKERS = ('NameResolutionError', 'Name or service not known', 'nodename nor servname',
+                'getaddrinfo failed', 'Temporary failure in name resolution')
+
+
+def classify_exception(error: BaseException) -> str:
+    """Failure kind of an exception raised while fetching"""
+    if isinstance(error, requests.exceptions.Timeout) or isinstance(error, TimeoutError):
+        return TIMEOUT
+    # aiohttp's connection errors are OSErrors rather than ConnectionErrors
+    if isinstance(error, (requests.exceptions.ConnectionError, ConnectionError, OSError)):
+        if any(marker in str(error) for marker in _DNS_MARKERS):
+            return DNS
+        return CONNECTION
+    # Selenium and other libraries: go by the name
+    name = type(error).__name__
+    if 'Timeout' in name:
+        return TIMEOUT
+    return ERROR
+
+
+def classify_response(status: int, html: str = '') -> Optional[str]:
+    """Failure kind of an HTTP response, None for a usable page"""
+    if status == 200:
+        if challenge_page(html):
+            return CHALLENGE
+        return None if html.strip() else EMPTY
+    if status == 429:
+        return RATE_LIMITED
+    # Cloudflare's 403 blocks often come without the challenge markup
+    if status == 403 or (status == 503 and challenge_page(html)):
+        return CHALLENGE
+    if status >= 500:
+        return HTTP_5XX
+    return HTTP_4XX
+
+
+class _HostCircuit:
+    def __init__(self):
+        self.state = 'closed'
+        self.failures = 0
+        self.last_kind: Optional[str] = None
+        self.reset_timeout = 0.0
+        self.open_until = 0.0
+        self.probe_deadline = 0.0
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker shared by every fetcher in the process
+    
+    Outage-type failures (DNS, timeouts, refused connections, 5xx, 429) are
+    counted per host; after failure_threshold in a row the circuit opens and
+    before_request() holds every caller for reset_timeout seconds, pausing
+    the whole pipeline instead of burning retries on each URL. Then it is
+    half-open: a single probe request is let through. Success closes the
+    circuit; another failure opens it again for twice as long, up to
+    max_reset_timeout. Any other HTTP answer, including a 404 or a challenge,
+    proves the host is up and counts as a success.
+    """
+    
+    _shared: Dict[Tuple, 'CircuitBreaker'] = {}
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60,
+                 max_reset_timeout: float = 900):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max(reset_timeout, max_reset_timeout)
+        self.opened = 0
+        self._cond = threading.Condition()
+        self._hosts: Dict[str, _HostCircuit] = {}
+    
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['CircuitBreaker']:
+        """Breaker for the site config's `circuit_breaker` section (shared within the process), or None if disabled"""
+        breaker_config = config.get('circuit_breaker', {})
+        if not breaker_config.get('enabled', True):
+            return None
+        key = (
+            breaker_config.get('failure_threshold', 5),
+            breaker_config.get('reset_timeout', 60),
+            breaker_config.get('max_reset_timeout', 900)
+        )
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(*key)
+            return cls._shared[key]
+    
+    def _host(self, url: str) -> Tuple[str, _HostCircuit]:
+        host = urlparse(url).netloc or url
+        if host not in self._hosts:
+            self._hosts[host] = _HostCircuit()
+        return host, self._hosts[host]
+    
+    def before_request(self, url: str):
+        """Block while url's host is open; in half-open state only one probe passes at a time"""
+        with self._cond:
+            host, circuit = self._host(url)
+            announced = False
+            while circuit.state != 'closed':
+                now = time.monotonic()
+                if circuit.state == 'open' and now >= circuit.open_until:
+                    circuit.state = 'half-open'
+                    circuit.probe_deadline = 0.0
+                if circuit.state == 'half-open' and now >= circuit.probe_deadline:
+                    # A probe that never reports back (crash) frees the slot after a while
+                    circuit.probe_deadline = now + max(30.0, circuit.reset_timeout)
+                    print(f"   Circuit half-open for {host}: probing with {url}")
+                    return
+                if not announced and circuit.state == 'open':
+                    print(f"   Circuit open for {host}: waiting {circuit.open_until - now:.0f}s")
+                    announced = True
+                until = circuit.open_until if circuit.state == 'open' else circuit.probe_deadline
+                self._cond.wait(max(0.05, until - now))
+    
+    def allows(self, url: str) -> bool:
+        """False while url's host is not closed (an in-line retry should give up)"""
+        with self._cond:
+            return self._host(url)[1].state == 'closed'
+    
+    def record_success(self, url: str):
+        with self._cond:
+            host, circuit = self._host(url)
+            if circuit.state != 'closed':
+                print(f"   Circuit closed for {host}: probe succeeded, resuming")
+                self._cond.notify_all()
+            circuit.state = 'closed'
+            circuit.failures = 0
+            circuit.reset_timeout = 0.0
+    
+    def record_failure(self, url: str, kind: str):
+        """Record a failed request; only outage kinds count, an HTTP answer proves the host is up"""
+        if kind not in OUTAGE_KINDS:
+            if kind != ERROR:
+                self.record_success(url)
+            return
+        with self._cond:
+            host, circuit = self._host(url)
+            circuit.failures += 1
+            circuit.last_kind = kind
+            if circuit.state == 'half-open':
+                circuit.reset_timeout = min(self.max_reset_timeout, circuit.reset_timeout * 2)
+            elif circuit.state == 'closed' and circuit.failures >= self.failure_threshold:
+                circuit.reset_timeout = self.reset_timeout
+            else:
+                return
+            circuit.state = 'open'
+            circuit.open_until = time.monotonic() + circuit.reset_timeout
+            self.opened += 1
+            print(f"   Circuit open for {host} after {circuit.failures} failures in a row "
+                  f"(last: {kind}): pausing requests for {circuit.reset_timeout:.0f}s")
+            self._cond.notify_all()
+    
+    def state(self, url: str) -> str:
+        with self._cond:
+            return self._host(url)[1].state
@@ -1,33 +1,64 @@
 import re
 from bs4 import BeautifulSoup
+from typing import Dict, Iterable, Iterator
 
 
 class ContentCleaner:
-    """Clean and normalize chapter content"""
+    """
+    Clean and normalize chapter content
+    
+    The rules are compiled once from the site config's `cleaner` section.
+    Ad lines and URLs are only rewritten when a plain substring check finds
+    them; whitespace is normalized in a single pass that keeps paragraph
+    breaks: space runs become one space, line breaks are kept, and two or
+    more line breaks become one paragraph break.
+    """
+    
+    # Ad lines on the Russian site: the phrase and the rest of its line go
+    DEFAULT_AD_PHRASES = ['Реклама:', 'Объявление:']
+    
+    # Whitespace that is not a single space: runs, line breaks, tabs, nbsp
+    WHITESPACE_PATTERN = re.compile(r'\s{2,}|[^\S ]')
+    URL_PATTERN = re.compile(r'https?://[^\s]+', re.IGNORECASE)
+    
+    def __init__(self, config: Dict = None):
+        cleaner_config = (config or {}).get('cleaner', {})
+        ad_phrases = cleaner_config.get('ad_phrases', self.DEFAULT_AD_PHRASES)
+        self._ad_phrases = [phrase.lower() for phrase in ad_phrases]
+        self._ads = None
+        if ad_phrases:
+            self._ads = re.compile(
+                '(?:' + '|'.join(re.escape(phrase) for phrase in ad_phrases) + r')[^\n]*',
+                re.IGNORECASE
+            )
+        self._remove_urls = cleaner_config.get('remove_urls', True)
     
     @staticmethod
-    def clean_text(text: str) -> str:
+    def _whitespace(match) -> str:
+        breaks = match.group().count('\n')
+        if breaks > 1:
+            return '\n\n'
+        return '\n' if breaks else ' '
+    
+    def clean_text(self, text: str) -> str:
         """Clean and normalize text content"""
         if not text:
             return ""
         
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+        if self._ads is not None:
+            lowered = text.lower()
+            if any(phrase in lowered for phrase in self._ad_phrases):
+                text = self._ads.sub('', text)
+        if self._remove_urls and '://' in text:
+            text = self.URL_PATTERN.sub('', text)
         
-        # Remove common ad phrases (Russian site specific)
-        ad_patterns = [
-            r'Реклама:.*?(?=\n|$)',
-            r'Объявление:.*?(?=\n|$)',
-            r'https?://[^\s]+',  # Remove URLs
-        ]
-        
-        for pattern in ad_patterns:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-        
-        # Normalize line breaks
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        return text.strip()
+        return self.WHITESPACE_PATTERN.sub(self._whitespace, text).strip()
+    
+    def clean_many(self, texts: Iterable[str]) -> Iterator[str]:
+        """Clean a batch of texts (e.g. a pipeline chunk) with the compiled rules"""
+        clean_text = self.clean_text
+        for text in texts:
+            yield clean_text(text)
     
     @staticmethod
     def clean_html(html: str, remove_selectors: list = None) -> str:
@@ -6,11 +6,20 @@ import shutil
 from typing import Optional, Dict, Any
 from fake_useragent import UserAgent
 
+from .browser_pool import BrowserPool
+from .session_bridge import SessionBridge
+from .html_cache import HtmlCache
+from .rate_limiter import RateLimiter, retry_after_seconds
+from .circuit_breaker import (
+    CHALLENGE, CIRCUIT_OPEN, EMPTY, ERROR, HTTP_4XX, HTTP_5XX, OUTAGE_KINDS, RATE_LIMITED,
+    CircuitBreaker, classify_exception, classify_response
+)
+from .readiness import (
+    PageReadiness, challenge_cleared, data_script_present, element_present, link_count_stable
+)
+
 try:
     from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
     from selenium.webdriver.chrome.options import Options as ChromeOptions
     from selenium.webdriver.chrome.service import Service as ChromeService
     from selenium.webdriver.firefox.options import Options as FirefoxOptions
@@ -41,13 +50,25 @@ except ImportError:
 class CloudflareBypass:
     """Handles Cloudflare bypass using cloudscraper and selenium fallback"""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], browser_pool: BrowserPool = None):
         self.config = config
         self.ua = UserAgent()
         self.scraper = None
-        self.driver = None
         self.method = None
-        
+        # A pool passed in is shared with other instances and closed by its owner
+        self.browser_pool = browser_pool
+        self._owns_pool = browser_pool is None
+        # Clearance solved in Selenium is reused by cloudscraper until it expires
+        self.session_bridge = SessionBridge(config.get('session', {}).get('cookie_file'))
+        # Optional raw page cache; in offline mode it is the only source
+        self.cache = HtmlCache.from_config(config)
+        # Shared with every other instance (and process) using the same settings
+        self.rate_limiter = RateLimiter.from_config(config)
+        # Shared with every other instance in this process; None if disabled
+        self.breaker = CircuitBreaker.from_config(config)
+        # Failure kind behind the last get() that returned None, None after a success
+        self.last_failure = None
+    
     def _get_random_user_agent(self) -> str:
         """Get random user agent from config or generate one"""
         user_agents = self.config.get('user_agents', [])
@@ -91,6 +112,18 @@ class CloudflareBypass:
         print("     Firefox:  firefox --version\n")
         return None
     
+    def _get_browser_pool(self) -> BrowserPool:
+        """Create the warm browser pool on first Selenium use"""
+        if self.browser_pool is None:
+            selenium_config = self.config.get('selenium', {})
+            self.browser_pool = BrowserPool(
+                self._init_selenium,
+                size=selenium_config.get('pool_size', 1),
+                max_pages=selenium_config.get('max_pages_per_browser', 50)
+            )
+            self.browser_pool.start()
+        return self.browser_pool
+    
     def _find_chrome_binary(self):
         """Find Chrome/Chromium binary path"""
         possible_paths = [
@@ -145,7 +178,7 @@ class CloudflareBypass:
             driver = webdriver.Chrome(options=options)
             driver.set_page_load_timeout(self.config.get('retry', {}).get('timeout', 30))
             return driver
-            
+        
         except Exception as e:
             # Chrome failed, will try Firefox
             return None
@@ -169,10 +202,10 @@ class CloudflareBypass:
                 driver = webdriver.Firefox(service=service, options=options)
             else:
                 driver = webdriver.Firefox(options=options)
-                
+            
             driver.set_page_load_timeout(self.config.get('retry', {}).get('timeout', 30))
             return driver
-            
+        
         except Exception as e:
             return None
     
@@ -181,16 +214,76 @@ class CloudflareBypass:
         Fetch URL with Cloudflare bypass
         Returns HTML content or None on failure
         
+        Failures are classified (DNS, timeout, 4xx, 5xx, challenge, ...) and
+        fed to the host's circuit breaker: while it is open this call waits,
+        and once it opens mid-retry the URL is given up so the caller can
+        queue it for a later retry.
+        On None, last_failure holds the kind of the final failure
+        (circuit_open for a give-up), so callers can tell a challenge worth
+        a browser from a missing page.
+        
         Args:
             url: URL to fetch
             max_retries: Number of retry attempts
             force_selenium: Force use of Selenium (for JavaScript-rendered pages)
         """
+        self.last_failure = None
+        if self.cache is None:
+            return self._fetch(url, max_retries, force_selenium)
+        
+        # Rendered and raw versions of a page differ, so cache them separately
+        cache_key = f'selenium:{url}' if force_selenium else url
+        html = self.cache.get(cache_key)
+        if html is not None:
+            self.method = 'cache'
+            return html
+        
+        if self.cache.offline:
+            print(f"Cache miss (offline mode): {url}")
+            return None
+        
+        html = self._fetch(url, max_retries, force_selenium)
+        if html:
+            self.cache.put(cache_key, html)
+        return html
+    
+    def _wait_turn(self, url: str):
+        """Wait for this host's next request slot; list pages cost more"""
+        cost = self.config.get('rate_limit', {}).get('list_page_cost', 1) if '/chapters/' in url else 1
+        self.rate_limiter.acquire(url, cost)
+    
+    def _circuit_closed(self, url: str) -> bool:
+        if self.breaker is None or self.breaker.allows(url):
+            return True
+        print(f"   Giving up on {url} for now (circuit open)")
+        self.last_failure = CIRCUIT_OPEN
+        return False
+    
+    def _record_success(self, url: str):
+        self.last_failure = None
+        if self.breaker is not None:
+            self.breaker.record_success(url)
+    
+    def _record_failure(self, url: str, kind: str):
+        self.last_failure = kind
+        if self.breaker is not None:
+            self.breaker.record_failure(url, kind)
+    
+    def report_empty(self, url: str):
+        """Nothing could be parsed from url's page, usually a sign of throttling"""
+        self.rate_limiter.backoff(url, 'empty parse')
+    
+    def _fetch(self, url: str, max_retries: int = None, force_selenium: bool = False) -> Optional[str]:
+        """Fetch URL from the network (cloudscraper, then Selenium)"""
         if max_retries is None:
             max_retries = self.config.get('retry', {}).get('max_attempts', 3)
         
         backoff_factor = self.config.get('retry', {}).get('backoff_factor', 2)
         
+        # While the host's circuit is open every fetcher waits here
+        if self.breaker is not None:
+            self.breaker.before_request(url)
+        
         # If forced to use Selenium (for Vue.js pages), skip cloudscraper
         if force_selenium:
             if not SELENIUM_AVAILABLE:
@@ -204,121 +297,151 @@ class CloudflareBypass:
                 print("  macOS:         brew install --cask google-chrome")
                 print("  Windows:       Download from https://www.google.com/chrome/")
                 print("="*60 + "\n")
+                self.last_failure = ERROR
                 return None
             return self._get_with_selenium(url)
         
         for attempt in range(max_retries):
+            # The host went down meanwhile: leave this URL to the caller's retry queue
+            if attempt and not self._circuit_closed(url):
+                return None
+            
             try:
                 # Try cloudscraper first
                 if self.scraper is None:
                     self.scraper = self._init_cloudscraper()
                 
+                self._wait_turn(url)
                 self.method = 'cloudscraper'
+                # The clearance cookie is bound to the User-Agent that earned it
+                clearance_ua = self.session_bridge.apply(self.scraper, url)
                 response = self.scraper.get(
                     url,
-                    headers={'User-Agent': self._get_random_user_agent()},
+                    headers={'User-Agent': clearance_ua or self._get_random_user_agent()},
                     timeout=self.config.get('retry', {}).get('timeout', 30)
                 )
-                
-                if response.status_code == 200:
-                    return response.text
-                
-                # If cloudscraper fails with 403/503, try selenium
-                if response.status_code in [403, 503] and SELENIUM_AVAILABLE:
-                    print(f"Cloudscraper failed ({response.status_code}), trying Selenium...")
-                    return self._get_with_selenium(url)
-                
+            
             except Exception as e:
-                print(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
+                kind = classify_exception(e)
+                self._record_failure(url, kind)
+                print(f"Attempt {attempt + 1}/{max_retries} failed ({kind}): {e}")
                 
                 if attempt < max_retries - 1:
                     wait_time = backoff_factor ** attempt
                     print(f"Retrying in {wait_time} seconds...")
                     time.sleep(wait_time)
-                else:
-                    # Last attempt with Selenium
-                    if SELENIUM_AVAILABLE:
-                        print("Final attempt with Selenium...")
-                        return self._get_with_selenium(url)
+                elif SELENIUM_AVAILABLE and kind not in OUTAGE_KINDS:
+                    # A browser does not help when the host is unreachable
+                    print("Final attempt with Selenium...")
+                    return self._get_with_selenium(url)
+                continue
+            
+            kind = classify_response(response.status_code, response.text)
+            if kind is None:
+                self.rate_limiter.success(url)
+                self._record_success(url)
+                return response.text
+            
+            self._record_failure(url, kind)
+            status = 'challenge page' if response.status_code == 200 else f"HTTP {response.status_code}"
+            
+            if kind == HTTP_4XX:
+                # Missing or forbidden page: retrying will not change the answer
+                print(f"   {url}: {status}, not retrying")
+                return None
+            
+            # The site is pushing back: slow this host down before any retry
+            if kind in (CHALLENGE, RATE_LIMITED, HTTP_5XX, EMPTY):
+                self.rate_limiter.backoff(
+                    url, status if kind != EMPTY else 'empty response',
+                    retry_after=retry_after_seconds(response.headers.get('Retry-After'))
+                )
+            
+            if kind == CHALLENGE:
+                if clearance_ua:
+                    print(f"Stored clearance rejected ({status}), discarding it")
+                    self.session_bridge.invalidate(url)
+                
+                # If cloudscraper fails with 403/503 or a challenge, try selenium
+                if SELENIUM_AVAILABLE:
+                    print(f"Cloudscraper failed ({status}), trying Selenium...")
+                    return self._get_with_selenium(url)
         
         return None
     
     def _get_with_selenium(self, url: str) -> Optional[str]:
         """Fallback to Selenium for tough Cloudflare challenges"""
+        pool = self._get_browser_pool()
         max_retries = 2
         for attempt in range(max_retries):
+            if attempt and not self._circuit_closed(url):
+                return None
+            self._wait_turn(url)
+            driver = pool.acquire()
+            if driver is None:
+                self.last_failure = ERROR
+                return None
+            
             try:
-                # Reinitialize driver on retry or if not available
-                if self.driver is None or attempt > 0:
-                    if self.driver is not None:
-                        try:
-                            self.driver.quit()
-                        except:
-                            pass
-                        self.driver = None
-                    
-                    self.driver = self._init_selenium()
-                    if self.driver is None:
-                        return None
-                
                 self.method = 'selenium'
-                self.driver.get(url)
-                
-                # Wait for page to load and Cloudflare challenge to complete
-                time.sleep(5)
-                
-                # Wait for body element
-                WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                
-                # For Vue.js pages, wait for the chapters container
-                if 'chapters' in url:
-                    try:
-                        print(f"   Waiting for Vue.js to render chapters...")
-                        # Wait much longer for Vue.js to fully execute and render
-                        time.sleep(10)
-                        
-                        # Try to wait for actual chapter links (with book ID pattern)
-                        try:
-                            WebDriverWait(self.driver, 20).until(
-                                lambda d: len(d.find_elements(By.CSS_SELECTOR, "a[href*='.html']")) > 5
-                            )
-                            print(f"   ✓ Chapter links detected")
-                        except:
-                            print(f"   ⚠ Timeout waiting for chapter links, proceeding anyway...")
-                        
-                        # Extra wait for any remaining JavaScript
-                        time.sleep(5)
-                    except Exception as e:
-                        # Fallback if something goes wrong
-                        print(f"   ⚠ Exception during wait: {e}")
-                        time.sleep(10)
-                else:
-                    # Additional wait for dynamic content
-                    time.sleep(2)
-                
-                return self.driver.page_source
-                
+                html = self._render_page(driver, url)
             except Exception as e:
+                # Recycle the crashed browser; the retry leases a warm one
+                pool.release(driver, broken=True)
+                self._record_failure(url, classify_exception(e))
                 if attempt < max_retries - 1:
                     print(f"   Selenium attempt {attempt + 1} failed, retrying...")
                     continue
                 else:
                     print(f"Selenium failed: {e}")
                     return None
+            
+            self._record_success(url)
+            self.session_bridge.capture(driver, url)
+            pool.release(driver)
+            return html
         
         return None
     
+    def _render_page(self, driver: Any, url: str) -> str:
+        """Load URL in a leased driver and return the page source once it is ready"""
+        selenium_config = self.config.get('selenium', {})
+        readiness = PageReadiness(
+            timeout=selenium_config.get('ready_timeout', 30),
+            poll_interval=selenium_config.get('poll_interval', 0.5)
+        )
+        
+        driver.get(url)
+        
+        # Cloudflare challenge must be gone before anything else is meaningful
+        if readiness.wait(driver, 'Cloudflare challenge cleared', challenge_cleared):
+            self.rate_limiter.success(url)
+        else:
+            self.rate_limiter.backoff(url, 'challenge not cleared')
+        
+        if 'chapters' in url:
+            # Vue.js renders the chapter list client-side; return once the
+            # link count stops changing between polls
+            print(f"   Waiting for Vue.js to render chapters...")
+            readiness.wait(driver, 'window.__DATA__ present', data_script_present,
+                           timeout=selenium_config.get('content_timeout', 10))
+            readiness.wait(driver, 'chapter links stable', link_count_stable())
+        else:
+            content_selector = self.config.get('selectors', {}).get('chapter_content', 'div.text-content')
+            readiness.wait(driver, 'chapter content present', element_present(content_selector),
+                           timeout=selenium_config.get('content_timeout', 10))
+        
+        return driver.page_source
+    
     def close(self):
         """Clean up resources"""
-        if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
+        if self.browser_pool is not None and self._owns_pool:
+            self.browser_pool.close()
+            self.browser_pool = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
         self.scraper = None
-        self.driver = None
     
     def __enter__(self):
         return self
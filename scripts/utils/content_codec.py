@@ -0,0 +1,207 @@
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+DICTIONARY_TABLE = 'content_dictionaries'
+
+
+def ensure_dictionary_table(conn: sqlite3.Connection):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {DICTIONARY_TABLE} (
+            book_id TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            dictionary BLOB,
+            created_at REAL NOT NULL
+        )
+    ''')
+
+
+class ContentCodec:
+    """
+    zstd compression of chapter text with a dictionary trained on the book
+    
+    Chapters of one novel share names, phrasing and formatting, so a small
+    dictionary trained on them lets every chapter compress well on its own
+    and stay individually decodable. Frames carry a content checksum, so
+    decoding also verifies the stored bytes.
+    """
+    
+    CODEC = 'zstd-dict'
+    
+    def __init__(self, dictionary: Optional[bytes] = None, level: int = 12):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is required for compressed content (pip install zstandard)")
+        self.dictionary = dictionary
+        self.level = level
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data, write_checksum=True)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+    
+    @classmethod
+    def train(cls, texts: Iterable[str], dict_size: int = 112640, level: int = 12) -> 'ContentCodec':
+        """Train a dictionary on chapter texts; falls back to plain zstd if there is too little data"""
+        samples = [text.encode('utf-8') for text in texts if text]
+        dictionary = None
+        # zstd needs many samples, and a dictionary larger than the data is pointless
+        if len(samples) >= 8 and sum(len(s) for s in samples) > dict_size * 4:
+            try:
+                dictionary = zstandard.train_dictionary(dict_size, samples).as_bytes()
+            except zstandard.ZstdError as e:
+                print(f"Warning: Could not train compression dictionary: {e}")
+        return cls(dictionary, level=level)
+    
+    def compress(self, text: str) -> bytes:
+        return self._compressor.compress(text.encode('utf-8'))
+    
+    def decompress(self, blob: bytes) -> str:
+        return self._decompressor.decompress(blob).decode('utf-8')
+    
+    def save(self, conn: sqlite3.Connection, book_id: str):
+        """Store the dictionary for book_id in the side table"""
+        ensure_dictionary_table(conn)
+        conn.execute(f'''
+            INSERT OR REPLACE INTO {DICTIONARY_TABLE} (book_id, codec, level, dictionary, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (book_id, self.CODEC, self.level, self.dictionary, time.time()))
+    
+    @classmethod
+    def load(cls, conn: sqlite3.Connection, book_id: str) -> Optional['ContentCodec']:
+        """Codec for book_id's stored content, or None if the book is stored uncompressed"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (DICTIONARY_TABLE,)
+        ).fetchone()
+        if not exists:
+            return None
+        row = conn.execute(
+            f'SELECT codec, level, dictionary FROM {DICTIONARY_TABLE} WHERE book_id = ?', (book_id,)
+        ).fetchone()
+        if not row:
+            return None
+        codec, level, dictionary = row
+        if codec != cls.CODEC:
+            raise ValueError(f"Unknown content codec: {codec}")
+        return cls(dictionary, level=level)
+
+
+def compression_report(texts: List[str], blobs: List[bytes], codec: ContentCodec) -> Dict:
+    """Size and per-chapter decode latency for a set of compressed chapters"""
+    dictionary = codec.dictionary
+    raw_bytes = sum(len(text.encode('utf-8')) for text in texts)
+    stored_bytes = sum(len(blob) for blob in blobs) + len(dictionary or b'')
+    
+    decode_ms = []
+    for blob in blobs:
+        start = time.perf_counter()
+        codec.decompress(blob)
+        decode_ms.append((time.perf_counter() - start) * 1000)
+    
+    decode_ms.sort()
+    return {
+        'chapters': len(blobs),
+        'raw_bytes': raw_bytes,
+        'stored_bytes': stored_bytes,
+        'dictionary_bytes': len(dictionary or b''),
+        'ratio': raw_bytes / stored_bytes if stored_bytes else 0.0,
+        'decode_ms_mean': statistics.mean(decode_ms) if decode_ms else 0.0,
+        'decode_ms_p95': decode_ms[int(len(decode_ms) * 0.95)] if decode_ms else 0.0,
+    }
+
+
+def format_report(report: Dict) -> str:
+    return (
+        f"{report['raw_bytes'] / 1e6:.2f} MB -> {report['stored_bytes'] / 1e6:.2f} MB "
+        f"(ratio {report['ratio']:.2f}:1, dictionary {report['dictionary_bytes'] / 1024:.0f} KiB), "
+        f"decode {report['decode_ms_mean']:.3f} ms mean / {report['decode_ms_p95']:.3f} ms p95 per chapter"
+    )
+
+
+class CompressedContentReader:
+    """Read chapters back from an export, decoding compressed content"""
+    
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        self._codecs: Dict[str, Optional[ContentCodec]] = {}
+    
+    def codec(self, book_id: str) -> Optional[ContentCodec]:
+        if book_id not in self._codecs:
+            self._codecs[book_id] = ContentCodec.load(self.conn, book_id)
+        return self._codecs[book_id]
+    
+    def chapters(self, book_id: str = None) -> Iterator[Dict]:
+        """Yield chapters with decoded content, in reading order"""
+        query = 'SELECT id, book_id, title, content, order_index, url FROM chapters'
+        params = ()
+        if book_id:
+            query += ' WHERE book_id = ?'
+            params = (book_id,)
+        query += ' ORDER BY book_id, COALESCE(order_index, id)'
+        for row_id, row_book, title, content, order_index, url in self.conn.execute(query, params):
+            if isinstance(content, bytes):
+                codec = self.codec(row_book)
+                if codec is None:
+                    raise ValueError(f"Chapter {row_id} is compressed but book {row_book} has no dictionary")
+                content = codec.decompress(content)
+            yield {
+                'id': row_id,
+                'book_id': row_book,
+                'title': title,
+                'content': content,
+                'order_index': order_index,
+                'url': url,
+            }
+    
+    def verify(self, book_id: str = None, expected: Dict[str, str] = None) -> Dict:
+        """
+        Decode every chapter (zstd checks each frame's checksum) and, if
+        expected maps url -> original text, compare the round trip
+        
+        Returns counts plus a per-book compression report for compressed rows
+        """
+        checked = mismatched = 0
+        errors: List[str] = []
+        query = 'SELECT id, book_id, content, url FROM chapters'
+        params = ()
+        if book_id:
+            query += ' WHERE book_id = ?'
+            params = (book_id,)
+        
+        compressed: Dict[str, Dict[str, List]] = {}
+        for row_id, row_book, content, url in self.conn.execute(query, params):
+            checked += 1
+            try:
+                if isinstance(content, bytes):
+                    codec = self.codec(row_book)
+                    if codec is None:
+                        raise ValueError("compressed but no dictionary")
+                    text = codec.decompress(content)
+                    book = compressed.setdefault(row_book, {'texts': [], 'blobs': []})
+                    book['texts'].append(text)
+                    book['blobs'].append(content)
+                else:
+                    text = content
+            except Exception as e:
+                errors.append(f"chapter {row_id}: {e}")
+                continue
+            if expected is not None and url in expected and expected[url] != text:
+                mismatched += 1
+                errors.append(f"chapter {row_id}: content differs from source ({url})")
+        
+        reports = {
+            row_book: compression_report(book['texts'], book['blobs'], self.codec(row_book))
+            for row_book, book in compressed.items()
+        }
+        return {'checked': checked, 'mismatched': mismatched, 'errors': errors, 'reports': reports}
+    
+    def close(self):
+        self.conn.close()
@@ -1,69 +1,162 @@
-import json
 import sqlite3
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional
 from pathlib import Path
 
+from .bulk_writer import SqliteBulkWriter
+from .json_stream import JsonArrayWriter
+from .content_codec import (
+    DICTIONARY_TABLE, ZSTD_AVAILABLE, ContentCodec, compression_report, format_report
+)
+
 
 class OutputFormatter:
     """Format and export scraped data to various formats"""
     
     @staticmethod
-    def export_json(chapters: List[Dict], output_path: str, book_info: Dict = None):
-        """Export to JSON format"""
-        data = {
-            'book_info': book_info or {},
-            'chapters': chapters
-        }
-        
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def export_json(chapters: Iterable[Dict], output_path: str, book_info: Dict = None):
+        """Export to JSON format (streamed, chapters may be any iterable)"""
+        with JsonArrayWriter(output_path, 'chapters', {'book_info': book_info or {}}) as writer:
+            count = writer.write_all(chapters)
         
-        print(f"✓ Exported {len(chapters)} chapters to JSON: {output_path}")
+        print(f"✓ Exported {count} chapters to JSON: {output_path}")
+    
+    CHAPTER_COLUMNS = ('book_id', 'title', 'content', 'order_index', 'bookTitle', 'url')
     
     @staticmethod
-    def export_sqlite(chapters: List[Dict], output_path: str, book_id: str):
-        """Export to SQLite (Room-compatible schema)"""
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        conn = sqlite3.connect(output_path)
-        cursor = conn.cursor()
-        
-        # Create table (Room-compatible schema)
-        cursor.execute('''
+    def _ensure_chapters_table(conn: sqlite3.Connection):
+        """Create the chapters table, adding the url column to older exports"""
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS chapters (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 book_id TEXT NOT NULL,
                 title TEXT NOT NULL,
                 content TEXT NOT NULL,
                 order_index INTEGER NOT NULL,
-                bookTitle TEXT DEFAULT 'Unknown'
+                bookTitle TEXT DEFAULT 'Unknown',
+                url TEXT
             )
         ''')
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(chapters)')}
+        if 'url' not in columns:
+            conn.execute('ALTER TABLE chapters ADD COLUMN url TEXT')
+        conn.commit()
+    
+    @staticmethod
+    def open_sqlite_writer(output_path: str, chunk_size: int = 500,
+                           journal_mode: str = 'WAL') -> SqliteBulkWriter:
+        """Bulk writer over the export schema, for incremental saves during a run"""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(output_path, timeout=30)
+        try:
+            OutputFormatter._ensure_chapters_table(conn)
+        finally:
+            conn.close()
+        return SqliteBulkWriter(output_path, OutputFormatter.CHAPTER_COLUMNS, chunk_size=chunk_size,
+                                journal_mode=journal_mode)
+    
+    @staticmethod
+    def open_content_codec(conn: sqlite3.Connection, book_id: str, compression: str = None,
+                           compression_level: int = 12) -> Optional[ContentCodec]:
+        """
+        Codec for rows written during a run, before the final export
+        
+        Rows must match the book's stored dictionary, so an existing codec is
+        reused. Otherwise there is nothing to train on yet and a codec without
+        a dictionary is stored; export_sqlite later trains one and rewrites
+        every row of the book with it.
+        """
+        if not compression:
+            return None
+        if compression != 'zstd':
+            raise ValueError(f"Unknown compression: {compression}")
+        if not ZSTD_AVAILABLE:
+            print("Warning: zstandard not installed, saving content uncompressed")
+            return None
+        codec = ContentCodec.load(conn, book_id)
+        if codec is None:
+            codec = ContentCodec(level=compression_level)
+            with conn:
+                codec.save(conn, book_id)
+        return codec
+    
+    @staticmethod
+    def chapter_row(chapter: Dict, book_id: str, idx: int = 0,
+                    codec: Optional[ContentCodec] = None) -> Dict:
+        """Map a scraped chapter dict onto the export columns"""
+        content = chapter.get('content', '')
+        return {
+            'book_id': book_id,
+            'title': chapter.get('title', 'Untitled'),
+            'content': codec.compress(content) if codec else content,
+            'order_index': chapter.get('order_index', idx),
+            'bookTitle': chapter.get('book_title', 'Unknown'),
+            'url': chapter.get('url')
+        }
+    
+    @staticmethod
+    def export_sqlite(chapters: List[Dict], output_path: str, book_id: str, chunk_size: int = 500,
+                      compression: str = None, compression_level: int = 12):
+        """
+        Export to SQLite (Room-compatible schema)
         
-        # Clear existing data for this book
-        cursor.execute('DELETE FROM chapters WHERE book_id = ?', (book_id,))
+        Rows are upserted by URL in chunked transactions so chapter ids stay
+        stable across exports; rows of this book that are no longer in chapters
+        are removed. The finished file is analyzed and vacuumed.
         
-        # Insert chapters
-        for idx, chapter in enumerate(chapters):
-            cursor.execute('''
-                INSERT INTO chapters (book_id, title, content, order_index, bookTitle)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                book_id,
-                chapter.get('title', 'Untitled'),
-                chapter.get('content', ''),
-                chapter.get('order_index', idx),
-                chapter.get('book_title', 'Unknown')
-            ))
+        compression='zstd' stores content as zstd BLOBs sharing a dictionary
+        trained on this book, kept in the content_dictionaries table (read back
+        with utils.content_codec.CompressedContentReader).
+        """
+        codec = None
+        if compression == 'zstd':
+            if ZSTD_AVAILABLE:
+                codec = ContentCodec.train(
+                    (chapter.get('content', '') for chapter in chapters), level=compression_level
+                )
+            else:
+                print("Warning: zstandard not installed, exporting content uncompressed")
+        elif compression:
+            raise ValueError(f"Unknown compression: {compression}")
         
-        conn.commit()
-        conn.close()
+        has_urls = all(chapter.get('url') for chapter in chapters)
+        writer = OutputFormatter.open_sqlite_writer(output_path, chunk_size=chunk_size)
+        texts, blobs = [], []
+        
+        def rows():
+            for idx, chapter in enumerate(chapters):
+                row = OutputFormatter.chapter_row(chapter, book_id, idx)
+                if codec:
+                    texts.append(row['content'])
+                    row['content'] = codec.compress(row['content'])
+                    blobs.append(row['content'])
+                yield row
+        
+        try:
+            with writer.conn:
+                if not has_urls:
+                    # Without URLs rows cannot be matched, replace the book wholesale
+                    writer.conn.execute('DELETE FROM chapters WHERE book_id = ?', (book_id,))
+                if codec:
+                    codec.save(writer.conn, book_id)
+                elif writer.conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (DICTIONARY_TABLE,)
+                ).fetchone():
+                    # Content is plain again, a leftover dictionary would mislead readers
+                    writer.conn.execute(f'DELETE FROM {DICTIONARY_TABLE} WHERE book_id = ?', (book_id,))
+            
+            writer.add_many(rows())
+            # Drop rows no longer present (including pre-url exports)
+            removed = writer.prune(book_id, (chapter['url'] for chapter in chapters)) if has_urls else 0
+        except Exception:
+            writer.close()
+            raise
+        writer.close(optimize=True)
         
-        print(f"✓ Exported {len(chapters)} chapters to SQLite: {output_path}")
+        print(f"✓ Exported {len(chapters)} chapters to SQLite: {output_path} "
+              f"({writer.inserted} new, {writer.updated} updated, {removed} removed)")
+        if codec:
+            print(f"  zstd content: {format_report(compression_report(texts, blobs, codec))}")
     
     @staticmethod
     def export_txt(chapters: List[Dict], output_path: str, book_info: Dict = None):
@@ -87,7 +180,8 @@ class OutputFormatter:
         print(f"✓ Exported {len(chapters)} chapters to TXT: {output_path}")
     
     @staticmethod
-    def export_all(chapters: List[Dict], base_name: str, book_id: str, book_info: Dict = None):
+    def export_all(chapters: List[Dict], base_name: str, book_id: str, book_info: Dict = None,
+                   compression: str = None, compression_level: int = 12):
         """Export to all formats"""
         base_path = Path(base_name)
         
@@ -100,7 +194,9 @@ class OutputFormatter:
         OutputFormatter.export_sqlite(
             chapters,
             str(base_path.with_suffix('.db')),
-            book_id
+            book_id,
+            compression=compression,
+            compression_level=compression_level
         )
         
         OutputFormatter.export_txt(
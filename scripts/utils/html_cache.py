@@ -0,0 +1,216 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+class HtmlCache:
+    """
+    Content-addressed store of raw fetched pages
+    
+    Bodies are compressed (zstd, or gzip when zstandard is missing) and stored
+    once per content hash under objects/; a small SQLite index maps each URL to
+    its latest hash. Entries older than ttl are treated as misses unless the
+    cache is read in offline mode, and the least recently used entries are
+    evicted once the store grows past max_bytes.
+    """
+    
+    def __init__(self, cache_dir: str, ttl: float = None, max_bytes: int = None,
+                 compression: str = 'zstd', offline: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.compression = compression if compression != 'zstd' or ZSTD_AVAILABLE else 'gzip'
+        self._lock = threading.Lock()
+        
+        self.conn = sqlite3.connect(self.cache_dir / 'index.db', timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages(accessed_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_pages_hash ON pages(hash)')
+        self.conn.commit()
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['HtmlCache']:
+        """Build a cache from the site config's `cache` section, or None if disabled"""
+        cache_config = config.get('cache', {})
+        if not cache_config.get('enabled') and not cache_config.get('offline'):
+            return None
+        ttl_days = cache_config.get('ttl_days')
+        max_size_mb = cache_config.get('max_size_mb')
+        return cls(
+            cache_config.get('dir', 'output/html_cache'),
+            ttl=ttl_days * 86400 if ttl_days else None,
+            max_bytes=int(max_size_mb * 1024 * 1024) if max_size_mb else None,
+            compression=cache_config.get('compression', 'zstd'),
+            offline=cache_config.get('offline', False)
+        )
+    
+    def _object_path(self, digest: str) -> Path:
+        suffix = '.zst' if self.compression == 'zstd' else '.gz'
+        return self.objects_dir / digest[:2] / (digest + suffix)
+    
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+    
+    @staticmethod
+    def _decompress(path: Path) -> bytes:
+        with open(path, 'rb') as f:
+            data = f.read()
+        if path.suffix == '.zst':
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+    
+    @staticmethod
+    def read_object(path: Path) -> str:
+        """Decode a stored object (usable from worker processes without an index connection)"""
+        return HtmlCache._decompress(Path(path)).decode('utf-8')
+    
+    def _find_object(self, digest: str) -> Optional[Path]:
+        for suffix in ('.zst', '.gz'):
+            path = self.objects_dir / digest[:2] / (digest + suffix)
+            if path.exists():
+                return path
+        return None
+    
+    def get(self, url: str) -> Optional[str]:
+        """Return the cached body for url, or None on a miss or expired entry"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT hash, fetched_at FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+            if not row:
+                return None
+            digest, fetched_at = row
+            if not self.offline and self.ttl and time.time() - fetched_at > self.ttl:
+                return None
+            self.conn.execute('UPDATE pages SET accessed_at = ? WHERE url = ?', (time.time(), url))
+            self.conn.commit()
+        
+        path = self._find_object(digest)
+        if path is None:
+            return None
+        try:
+            return self._decompress(path).decode('utf-8')
+        except Exception as e:
+            print(f"Warning: Corrupt cache entry for {url}: {e}")
+            return None
+    
+    def lookup(self, url: str) -> Optional[Path]:
+        """
+        Object path of the most recently fetched body for url, raw or
+        Selenium-rendered, ignoring ttl and leaving access times untouched
+        """
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT hash FROM pages WHERE url IN (?, ?) ORDER BY fetched_at DESC LIMIT 1',
+                (url, f'selenium:{url}')
+            ).fetchone()
+        return self._find_object(row[0]) if row else None
+    
+    def put(self, url: str, body: str):
+        """Store body for url"""
+        if not body:
+            return
+        raw = body.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        
+        path = self._object_path(digest)
+        if self._find_object(digest) is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + f'.{os.getpid()}.{threading.get_ident()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(self._compress(raw))
+            os.replace(tmp_path, path)
+        size = (self._find_object(digest) or path).stat().st_size
+        
+        now = time.time()
+        with self._lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO pages (url, hash, size, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (url, digest, size, now, now))
+            self.conn.commit()
+        
+        if self.max_bytes:
+            self.evict()
+    
+    def total_bytes(self) -> int:
+        """Size of all distinct stored objects"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT hash, size FROM pages)'
+            ).fetchone()
+        return row[0]
+    
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        removed = set()
+        with self._lock:
+            if self.ttl and not self.offline:
+                cutoff = time.time() - self.ttl
+                removed.update(row[0] for row in self.conn.execute(
+                    'SELECT hash FROM pages WHERE fetched_at < ?', (cutoff,)
+                ))
+                self.conn.execute('DELETE FROM pages WHERE fetched_at < ?', (cutoff,))
+            
+            if self.max_bytes:
+                total = self.conn.execute(
+                    'SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT hash, size FROM pages)'
+                ).fetchone()[0]
+                if total > self.max_bytes:
+                    rows = self.conn.execute(
+                        'SELECT url, hash, size FROM pages ORDER BY accessed_at ASC'
+                    ).fetchall()
+                    for url, digest, size in rows:
+                        if total <= self.max_bytes:
+                            break
+                        self.conn.execute('DELETE FROM pages WHERE url = ?', (url,))
+                        removed.add(digest)
+                        still_used = self.conn.execute(
+                            'SELECT 1 FROM pages WHERE hash = ? LIMIT 1', (digest,)
+                        ).fetchone()
+                        if not still_used:
+                            total -= size
+            self.conn.commit()
+            
+            # Objects shared with another URL stay on disk
+            orphaned = [
+                digest for digest in removed
+                if not self.conn.execute('SELECT 1 FROM pages WHERE hash = ? LIMIT 1', (digest,)).fetchone()
+            ]
+        
+        for digest in orphaned:
+            path = self._find_object(digest)
+            if path is not None:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+    
+    def close(self):
+        with self._lock:
+            self.conn.close()
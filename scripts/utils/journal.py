@@ -0,0 +1,132 @@
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict
+
+
+class JournaledStore:
+    """
+    Crash-safe JSON state: a snapshot file plus an append-only JSONL journal
+    
+    Every update is one appended line, so its cost does not grow with the
+    size of the state. The journal is folded into the snapshot (written to a
+    temp file and atomically renamed) every compact_every records and on
+    close. On load the snapshot is read and newer journal records replayed;
+    a torn last line from a crash is ignored.
+    """
+    
+    SEQ_KEY = '_journal_seq'
+    
+    def __init__(self, path: str, apply: Callable[[Dict, Dict], None],
+                 default: Callable[[], Dict], compact_every: int = 500, fsync: bool = False):
+        self.path = Path(path)
+        self.journal_path = Path(str(self.path) + '.journal')
+        self.apply = apply
+        self.default = default
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._journal = None
+        self._pending = 0
+        self._torn = False
+        self.data = self._load()
+        if self._torn:
+            # Rewrite without the torn tail so new records start on a clean line
+            self.compact()
+    
+    def _load(self) -> Dict:
+        """Read snapshot and replay journal records written after it"""
+        data = None
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not load checkpoint: {e}")
+        if not isinstance(data, dict):
+            data = self.default()
+        
+        seq = data.get(self.SEQ_KEY, 0)
+        if self.journal_path.exists():
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash, nothing after it is trustworthy
+                        self._torn = True
+                        break
+                    if record.get('seq', 0) <= seq:
+                        continue
+                    self.apply(data, record)
+                    seq = record['seq']
+                    self._pending += 1
+        
+        data[self.SEQ_KEY] = seq
+        return data
+    
+    def _open_journal(self):
+        if self._journal is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        return self._journal
+    
+    def append(self, record: Dict):
+        """Apply an update in memory and append it to the journal"""
+        self.data[self.SEQ_KEY] = self.data.get(self.SEQ_KEY, 0) + 1
+        record = dict(record, seq=self.data[self.SEQ_KEY])
+        self.apply(self.data, record)
+        
+        journal = self._open_journal()
+        journal.write(json.dumps(record, ensure_ascii=False) + '\n')
+        journal.flush()
+        if self.fsync:
+            os.fsync(journal.fileno())
+        
+        self._pending += 1
+        if self._pending >= self.compact_every:
+            self.compact()
+    
+    def compact(self):
+        """Fold the journal into a fresh snapshot"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(str(self.path) + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        
+        # Snapshot carries the sequence number, so stale records are skipped
+        # even if we crash before the truncate below
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self._pending = 0
+    
+    def reset(self, data: Dict = None):
+        """Replace the whole state and compact immediately"""
+        seq = self.data.get(self.SEQ_KEY, 0)
+        self.data = data if data is not None else self.default()
+        self.data[self.SEQ_KEY] = seq
+        self.compact()
+    
+    def delete(self):
+        """Remove snapshot and journal from disk"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        for path in (self.path, self.journal_path):
+            if path.exists():
+                path.unlink()
+        self.data = self.default()
+        self._pending = 0
+    
+    def close(self):
+        """Compact outstanding journal records"""
+        if self._pending:
+            self.compact()
+        elif self._journal is not None:
+            self._journal.close()
+            self._journal = None
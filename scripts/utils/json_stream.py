@@ -0,0 +1,208 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',]}'
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class JsonArrayWriter:
+    """
+    Write a JSON document one array item at a time
+    
+    Produces the same text as json.dump(..., indent=2) of either a bare list
+    (array_key=None) or {**header, array_key: [items]}, without holding the
+    items in memory. The file is written to a temp path and renamed into
+    place on close, so readers never see a half-written document.
+    """
+    
+    def __init__(self, path: str, array_key: Optional[str] = None, header: Dict = None,
+                 ensure_ascii: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.array_key = array_key
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+        self._tmp_path = Path(str(self.path) + '.tmp')
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        
+        if array_key is None:
+            self._item_indent = '  '
+            self._file.write('[')
+        else:
+            self._item_indent = '    '
+            self._file.write('{')
+            for key, value in (header or {}).items():
+                self._file.write('\n  ' + self._dumps(key) + ': ' + self._dumps(value, '  ') + ',')
+            self._file.write('\n  ' + self._dumps(array_key) + ': [')
+    
+    def _dumps(self, value: Any, indent: str = '') -> str:
+        text = json.dumps(value, ensure_ascii=self.ensure_ascii, indent=2)
+        return text.replace('\n', '\n' + indent) if indent else text
+    
+    def write(self, item: Any):
+        if self.count:
+            self._file.write(',')
+        self._file.write('\n' + self._item_indent + self._dumps(item, self._item_indent))
+        self.count += 1
+    
+    def write_all(self, items: Iterable[Any]) -> int:
+        for item in items:
+            self.write(item)
+        return self.count
+    
+    def close(self):
+        """Finish the document and move it into place"""
+        if self._file is None:
+            return
+        closing = self._item_indent[:-2]
+        if self.count:
+            self._file.write('\n' + closing)
+        self._file.write(']')
+        if self.array_key is not None:
+            self._file.write('\n}')
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp_path, self.path)
+    
+    def abort(self):
+        """Discard the partial document"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._tmp_path.unlink(missing_ok=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class _Scanner:
+    """Incremental top-level JSON scanner over a file, decoding one value at a time"""
+    
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+    
+    def _fill(self) -> bool:
+        """Read more input, dropping consumed text; False at end of file"""
+        if self.eof:
+            return False
+        # A value larger than the buffer doubles what is pending per read,
+        # so it is re-parsed O(log n) times rather than once per chunk
+        chunk = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """Next non-whitespace character (not consumed), '' at end of input"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+    
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found!r}")
+        self.pos += 1
+    
+    def value(self) -> Any:
+        """Decode the next complete value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number cut off by the buffer edge ('12.' of '12.5') still
+                # decodes, so it only counts once a delimiter follows it
+                if self.eof or (end < len(self.buf) and
+                                (not _is_number(value) or self.buf[end] in _DELIMITERS)):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._fill():
+                # Retry once more on the full input, then let errors surface
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                self.pos = end
+                return value
+    
+    def items(self) -> Iterator[Any]:
+        """Yield elements of the array starting at the current position"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}")
+
+
+def iter_json_array(path: str, array_key: Optional[str] = None, header: Dict = None,
+                    chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Lazily yield the items of a JSON array file
+    
+    array_key=None reads a top-level list; otherwise the list stored under
+    array_key in a top-level object (a top-level list is accepted as well). Other top-level keys are decoded into
+    header as they are passed (keys after the array only once it is
+    exhausted). JSONL files (.jsonl) yield one item per line.
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix == '.jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        
+        scanner = _Scanner(f, chunk_size)
+        if array_key is None or scanner.peek() == '[':
+            yield from scanner.items()
+            return
+        
+        scanner.expect('{')
+        if scanner.peek() == '}':
+            return
+        while True:
+            key = scanner.value()
+            scanner.expect(':')
+            if key == array_key and scanner.peek() == '[':
+                yield from scanner.items()
+            else:
+                value = scanner.value()
+                if header is not None:
+                    header[key] = value
+            char = scanner.peek()
+            scanner.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' in JSON object, found {char!r}")
@@ -1,14 +1,107 @@
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional, Tuple
+from bs4 import BeautifulSoup, NavigableString
+from lxml import etree
+import soupsieve
+from typing import List, Dict, Optional, Tuple, Any
+import json
 import re
 
+# tag, .class, #id and combinations such as div.text-content
+_SIMPLE_SELECTOR = re.compile(r'^([a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)$')
+
+
+def _css_to_xpath(selector: str, axis: str = 'descendant') -> Optional[str]:
+    """XPath for a comma-separated list of simple CSS selectors, None if any part is more complex"""
+    paths = []
+    for part in selector.split(','):
+        part = part.strip()
+        match = _SIMPLE_SELECTOR.match(part)
+        if not part or not match:
+            return None
+        tag, qualifiers = match.groups()
+        conditions = ''
+        for kind, name in re.findall(r'([.#])([\w-]+)', qualifiers):
+            if kind == '.':
+                conditions += f"[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+            else:
+                conditions += f"[@id = '{name}']"
+        paths.append(f'{axis}::{tag or "*"}{conditions}')
+    return ' | '.join(paths)
+
+
+
+def _joined_text(element, skip: set) -> str:
+    """
+    Equivalent of BeautifulSoup get_text(strip=True), leaving out subtrees in skip
+    
+    Comments and processing instructions contribute no text but, as in bs4,
+    still split the text around them into separately stripped strings.
+    """
+    parts = []
+    
+    def walk(node):
+        if node.text and node.text.strip():
+            parts.append(node.text.strip())
+        for child in node:
+            if isinstance(child.tag, str) and child not in skip:
+                walk(child)
+            if child.tail and child.tail.strip():
+                parts.append(child.tail.strip())
+    
+    walk(element)
+    return ''.join(parts)
+
 
 class RanobesParser:
     """Parser for ranobes.top website"""
     
-    def __init__(self, config: Dict):
+    TITLE_SELECTORS = [
+        'h1.chapter-title',
+        'h1.entry-title',
+        '.chapter-title',
+        'h1',
+        '.title'
+    ]
+    
+    CONTENT_SELECTORS = [
+        'div.text-content',
+        'div.entry-content',
+        'article.text',
+        'div.chapter-content',
+        'div.content',
+        '.text-content',
+        '.entry-content'
+    ]
+    
+    # Containers considered by the text-density fallback
+    BLOCK_TAGS = ('div', 'article', 'section')
+    
+    CLEANUP_SELECTORS = [
+        'script', 'style', 'iframe', 'noscript',
+        'ins.adsbygoogle', 'div.ads', 'div.advertisement',
+        'nav', 'header', 'footer', '.navigation', '.breadcrumbs'
+    ]
+    
+    def __init__(self, config: Dict, fast_path: bool = True):
         self.config = config
         self.selectors = config.get('selectors', {})
+        self.fast_path = fast_path
+        # Configured and built-in cleanup selectors, deduplicated and compiled
+        # once into a single selector; the config list is never modified
+        self._cleanup_selectors = list(dict.fromkeys(self.selectors.get('remove_elements', []) + self.CLEANUP_SELECTORS))
+        self._cleanup = soupsieve.compile(', '.join(self._cleanup_selectors))
+        self._init_fast_path()
+    
+    def _init_fast_path(self):
+        """Compile the XPath queries used by the lxml fast path"""
+        # lxml parsers are not thread-safe, so each parser instance owns one.
+        # Comments are kept so text on either side stays two strings, as in bs4
+        self._html_parser = etree.HTMLParser()
+        self._fast_title = [etree.XPath(_css_to_xpath(s, 'descendant-or-self')) for s in self.TITLE_SELECTORS]
+        self._fast_content = [etree.XPath(_css_to_xpath(s, 'descendant-or-self')) for s in self.CONTENT_SELECTORS]
+        
+        remove_xpath = _css_to_xpath(', '.join(self._cleanup_selectors))
+        # A removal selector the fast path cannot express disables it
+        self._fast_remove = etree.XPath(remove_xpath) if remove_xpath else None
     
     def extract_book_id_from_url(self, url: str) -> Optional[str]:
         """Extract book ID from novel URL"""
@@ -26,12 +119,78 @@ class RanobesParser:
         
         return None
     
+    def extract_window_data(self, html: str) -> Optional[Dict]:
+        """Extract the window.__DATA__ JSON the list page is hydrated from"""
+        json_match = re.search(r'window\.__DATA__\s*=\s*({.+?})\s*</script>', html, re.DOTALL)
+        if not json_match:
+            return None
+        try:
+            data = json.loads(json_match.group(1))
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    
+    def _find_chapter_array(self, data: Any) -> Optional[List[Dict]]:
+        """Locate the list of chapter objects inside window.__DATA__"""
+        if isinstance(data, dict):
+            chapters = data.get('chapters')
+            if isinstance(chapters, list) and chapters and isinstance(chapters[0], dict):
+                return chapters
+            for value in data.values():
+                found = self._find_chapter_array(value)
+                if found:
+                    return found
+        elif isinstance(data, list) and data and isinstance(data[0], dict):
+            first = data[0]
+            link = first.get('link') or first.get('url') or first.get('href') or ''
+            if isinstance(link, str) and '.html' in link:
+                return data
+        return None
+    
+    def parse_chapter_list_data(self, html: str, base_url: str) -> Optional[List[Dict]]:
+        """
+        Parse chapter list from the embedded window.__DATA__ JSON (no browser needed)
+        Returns: list of chapter dicts, or None if the page has no usable data
+        """
+        data = self.extract_window_data(html)
+        if not data:
+            return None
+        
+        items = self._find_chapter_array(data)
+        if not items:
+            return None
+        
+        chapters = []
+        for item in items:
+            url = item.get('link') or item.get('url') or item.get('href') or ''
+            title = item.get('title') or item.get('name') or ''
+            if not isinstance(url, str) or not url or not title:
+                continue
+            
+            # Make absolute URL
+            if not url.startswith('http'):
+                url = base_url.rstrip('/') + '/' + url.lstrip('/')
+            
+            chapters.append({
+                'url': url,
+                'title': str(title).strip(),
+                'order_index': len(chapters)
+            })
+        
+        return chapters or None
+    
     def parse_chapter_list(self, html: str, base_url: str) -> Tuple[List[Dict], Optional[str]]:
         """
         Parse chapter list page
         Returns: (list of chapter dicts, next_page_url)
         """
         soup = BeautifulSoup(html, 'lxml')
+        
+        # Embedded JSON is the source Vue renders from, prefer it over the DOM
+        data_chapters = self.parse_chapter_list_data(html, base_url)
+        if data_chapters:
+            return data_chapters, self._find_next_page(soup, base_url)
+        
         chapters = []
         
         # Extract book_id from base_url
@@ -130,6 +289,10 @@ class RanobesParser:
         Parse individual chapter page with multiple fallback strategies
         Returns: dict with 'title' and 'content'
         """
+        parsed = self._fast_parse(html)
+        if parsed is not None:
+            return parsed
+        
         soup = BeautifulSoup(html, 'lxml')
         
         # Extract title - try multiple selectors
@@ -143,17 +306,62 @@ class RanobesParser:
             'content': content
         }
     
+    def _fast_parse(self, html: str) -> Optional[Dict[str, str]]:
+        """
+        Fast path: one native lxml parse, no BeautifulSoup tree and no
+        subtree copies. Returns what the selector strategy would return, or
+        None when that needs the full parse (no match, or content without
+        paragraphs).
+        """
+        if not self.fast_path or self._fast_remove is None or not html:
+            return None
+        try:
+            root = etree.fromstring(html, self._html_parser)
+        except (etree.LxmlError, ValueError):
+            return None
+        if root is None:
+            return None
+        
+        for xpath in self._fast_content:
+            found = xpath(root)
+            if not found:
+                continue
+            content = self._fast_paragraphs(found[0])
+            if content is None:
+                return None
+            if len(content) > 100:
+                return {
+                    'title': self._fast_extract_title(root),
+                    'content': content
+                }
+        return None
+    
+    def _fast_extract_title(self, root) -> str:
+        for xpath in self._fast_title:
+            found = xpath(root)
+            if found:
+                # get_text() skips script/style strings
+                title = _joined_text(found[0], set(found[0].iter('script', 'style', 'template')))
+                if title:
+                    return title
+        return "Untitled"
+    
+    def _fast_paragraphs(self, element) -> Optional[str]:
+        """Paragraph text of element with cleanup elements skipped in place, None if there is none"""
+        # bs4 get_text() leaves out <template> strings, paragraphs inside one included
+        removed = set(self._fast_remove(element)) | set(element.iter('template'))
+        content_parts = []
+        for p in element.iter('p'):
+            if removed and (p in removed or any(a in removed for a in p.iterancestors())):
+                continue
+            text = _joined_text(p, removed)
+            if text and len(text) > 10:
+                content_parts.append(text)
+        return '\n\n'.join(content_parts) if content_parts else None
+    
     def _extract_title(self, soup: BeautifulSoup) -> str:
         """Extract chapter title with fallback strategies"""
-        title_selectors = [
-            'h1.chapter-title',
-            'h1.entry-title', 
-            '.chapter-title',
-            'h1',
-            '.title'
-        ]
-        
-        for selector in title_selectors:
+        for selector in self.TITLE_SELECTORS:
             element = soup.select_one(selector)
             if element:
                 title = element.get_text(strip=True)
@@ -166,17 +374,7 @@ class RanobesParser:
         """Extract chapter content with multiple fallback strategies"""
         
         # Strategy 1: Try configured selectors
-        content_selectors = [
-            'div.text-content',
-            'div.entry-content',
-            'article.text',
-            'div.chapter-content',
-            'div.content',
-            '.text-content',
-            '.entry-content'
-        ]
-        
-        for selector in content_selectors:
+        for selector in self.CONTENT_SELECTORS:
             content_element = soup.select_one(selector)
             if content_element:
                 content = self._clean_and_extract(content_element)
@@ -192,31 +390,82 @@ class RanobesParser:
                 if len(content) > 100:
                     return content
         
-        # Strategy 3: Find largest text block
-        all_divs = soup.find_all(['div', 'article', 'section'])
-        max_content = ""
-        for div in all_divs:
-            text = self._clean_and_extract(div)
-            if len(text) > len(max_content):
-                max_content = text
+        # Strategy 3: Find the densest text block
+        block = self._find_main_block(soup)
+        if block is None:
+            return ""
+        content = self._clean_and_extract(block)
+        return content if len(content) > 100 else ""
+    
+    def _find_main_block(self, soup: BeautifulSoup):
+        """
+        Readability-style scoring in one bottom-up pass over the tree
         
-        return max_content if len(max_content) > 100 else ""
+        Each element's visible text and link text lengths are summed from its
+        children. Paragraphs (and text sitting directly in a block) add points
+        to their parent and half as many to their grandparent, and a block's
+        score is scaled by its link density, so the container holding the
+        story wins over page-wide wrappers, menus and comment lists.
+        """
+        elements = soup.find_all(True)
+        skip = {id(el) for el in self._cleanup.select(soup)}
+        hidden = set()
+        for el in elements:
+            if id(el) in skip or id(el.parent) in hidden:
+                hidden.add(id(el))
+        
+        text_len: Dict[int, int] = {}
+        link_len: Dict[int, int] = {}
+        score: Dict[int, float] = {}
+        
+        # Reversed document order visits every child before its parent
+        for el in reversed(elements):
+            key = id(el)
+            if key in hidden:
+                continue
+            own = 0
+            text = links = 0
+            for child in el.children:
+                if type(child) is NavigableString:
+                    own += len(child.strip())
+                elif id(child) in text_len:
+                    text += text_len[id(child)]
+                    links += link_len[id(child)]
+            text += own
+            text_len[key] = text
+            link_len[key] = text if el.name == 'a' else links
+            
+            if el.name == 'p':
+                if text > 25 and link_len[key] < text / 2:
+                    points = 1 + min(text // 100, 3)
+                    parent = el.parent
+                    if parent is not None:
+                        score[id(parent)] = score.get(id(parent), 0) + points
+                        if parent.parent is not None:
+                            score[id(parent.parent)] = score.get(id(parent.parent), 0) + points / 2
+            elif el.name in self.BLOCK_TAGS and own > 25:
+                # Text separated by <br> instead of paragraphs
+                score[key] = score.get(key, 0) + 1 + min(own // 100, 3)
+        
+        best, best_score = None, 0.0
+        for el in elements:
+            key = id(el)
+            if el.name not in self.BLOCK_TAGS or key not in text_len or not text_len[key]:
+                continue
+            final = score.get(key, 0) * (1 - link_len[key] / text_len[key])
+            if final > best_score:
+                best, best_score = el, final
+        return best
     
     def _clean_and_extract(self, element) -> str:
         """Clean element and extract text content"""
         # Make a copy to avoid modifying original
         element_copy = element.__copy__()
         
-        # Remove unwanted elements
-        remove_selectors = self.selectors.get('remove_elements', [])
-        remove_selectors.extend([
-            'script', 'style', 'iframe', 'noscript',
-            'ins.adsbygoogle', 'div.ads', 'div.advertisement',
-            'nav', 'header', 'footer', '.navigation', '.breadcrumbs'
-        ])
-        
-        for selector in remove_selectors:
-            for unwanted in element_copy.select(selector):
+        # Remove unwanted elements in one match pass; nested matches go
+        # with their ancestor
+        for unwanted in self._cleanup.select(element_copy):
+            if not unwanted.decomposed:
                 unwanted.decompose()
         
         # Extract text from paragraphs first
@@ -235,7 +484,6 @@ class RanobesParser:
         text = element_copy.get_text(separator='\n', strip=True)
         
         # Clean up multiple newlines
-        import re
         text = re.sub(r'\n{3,}', '\n\n', text)
         
         return text.strip()
@@ -246,15 +494,13 @@ class RanobesParser:
         
         # First, try to extract from the JSON data in the page
         # Look for: window.__DATA__ = {"pages_count":58,...}
-        json_match = re.search(r'window\.__DATA__\s*=\s*({.+?})\s*</script>', html, re.DOTALL)
-        if json_match:
+        data = self.extract_window_data(html)
+        if data:
             try:
-                import json
-                data = json.loads(json_match.group(1))
-                pages_count = data.get('pages_count', 1)
+                pages_count = int(data.get('pages_count', 1))
                 if pages_count > 0:
                     return pages_count
-            except:
+            except (TypeError, ValueError):
                 pass
         
         # Fallback 1: Look for pagination in div.pages (Vue.js rendered)
@@ -0,0 +1,323 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .cleaner import ContentCleaner
+from .html_cache import HtmlCache
+from .parser import RanobesParser
+from .rate_limiter import RateLimiter
+
+# Per-process parser state for pool workers, set up once by _init_worker
+_worker_parser: Optional[RanobesParser] = None
+_worker_cleaner: Optional[ContentCleaner] = None
+
+_DONE = object()
+
+
+def _init_worker(site_config: Dict):
+    global _worker_parser, _worker_cleaner
+    _worker_parser = RanobesParser(site_config)
+    _worker_cleaner = ContentCleaner(site_config)
+
+
+def parse_chapter_html(html: str) -> Dict[str, str]:
+    """
+    Parse and clean one chapter page (runs inside a pool worker)
+    
+    Returns the raw title, the normalized title and the cleaned content so
+    callers can keep their own title conventions.
+    """
+    parsed = _worker_parser.parse_chapter_content(html)
+    return {
+        'title': parsed['title'],
+        'normalized_title': _worker_cleaner.normalize_title(parsed['title']),
+        'content': _worker_cleaner.clean_text(parsed['content']),
+    }
+
+
+def parse_stored_pages(pages: Sequence[Tuple[Any, str]]) -> List[Tuple[Any, Optional[Dict], Optional[str]]]:
+    """
+    Parse a chunk of cached pages given as (key, object path) (runs inside a
+    pool worker); returns (key, parsed, error) per page
+    """
+    results = []
+    for key, path in pages:
+        try:
+            parsed = _worker_parser.parse_chapter_content(HtmlCache.read_object(path))
+            results.append((key, {
+                'title': parsed['title'],
+                'normalized_title': _worker_cleaner.normalize_title(parsed['title']),
+                'content': parsed['content'],
+            }, None))
+        except Exception as e:
+            results.append((key, None, str(e)))
+    
+    # Content of the whole chunk is cleaned in one batch
+    parsed_pages = [parsed for _, parsed, _ in results if parsed is not None]
+    for parsed, content in zip(parsed_pages, _worker_cleaner.clean_many(p['content'] for p in parsed_pages)):
+        parsed['content'] = content
+    return results
+
+
+def parser_pool(site_config: Dict, workers: int, spawn: bool = False) -> ProcessPoolExecutor:
+    """Process pool whose workers each hold a parser and cleaner for site_config"""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        # spawn: forking next to live fetch/browser threads can deadlock children
+        mp_context=multiprocessing.get_context('spawn') if spawn else None,
+        initializer=_init_worker,
+        initargs=(site_config,)
+    )
+
+
+class StageStats:
+    """Throughput counters for one pipeline stage"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.done = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.queue_peak = 0
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float, ok: bool = True):
+        with self._lock:
+            self.busy += seconds
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+    
+    def observe_queue(self, size: int):
+        if size > self.queue_peak:
+            self.queue_peak = size
+    
+    def summary(self, elapsed: float) -> str:
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        avg = self.busy / (self.done + self.failed) if self.done + self.failed else 0.0
+        return (f"{self.name}: {self.done} ok, {self.failed} failed, {rate:.2f}/s, "
+                f"{avg * 1000:.0f} ms avg, queue peak {self.queue_peak}")
+
+
+class ChapterPipeline:
+    """
+    fetch threads -> parser process pool -> single writer thread
+    
+    Network fetches, CPU-bound parsing and storage overlap instead of running
+    back to back. Each fetch thread holds its own session from
+    session_factory; parsing runs in worker processes (no GIL contention with
+    the fetchers); write() and on_failure() are only ever called from one
+    thread, so storage and checkpoint code needs no locking. Queues between stages are bounded, so a slow stage
+    holds back the ones before it instead of buffering the whole book.
+    
+    fetch(session, item) returns HTML or None; write(item, parsed) receives
+    parse_chapter_html's result; on_failure(item, stage, error) is called for
+    items that fail to fetch or parse. Failed fetches first go to a retry
+    queue that is worked through after the other items, up to retry_rounds
+    times, rather than being retried in line. A page that parses to no
+    content counts against the rate of its item's 'url' host.
+    """
+    
+    def __init__(self, site_config: Dict, fetch: Callable[[Any, Dict], Optional[str]],
+                 write: Callable[[Dict, Dict], None],
+                 session_factory: Callable[[], ContextManager] = None,
+                 fetch_workers: int = 1, parse_workers: int = 1, queue_size: int = 16,
+                 on_failure: Callable[[Dict, str, str], None] = None, retry_rounds: int = 0):
+        self.site_config = site_config
+        self.fetch = fetch
+        self.write = write
+        self.session_factory = session_factory or (lambda: nullcontext())
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = max(0, parse_workers)
+        self.queue_size = max(1, queue_size)
+        self.on_failure = on_failure or (lambda item, stage, error: None)
+        self.retry_rounds = max(0, retry_rounds)
+        self.retried = 0
+        self._retry_queue: List[Tuple[Dict, int]] = []
+        self._retry_lock = threading.Lock()
+        self.stats = {name: StageStats(name) for name in ('fetch', 'parse', 'write')}
+        self.stop_event = threading.Event()
+        # Same per-host limiter the fetch sessions use; pointless when replaying the cache
+        self.rate_limiter = None
+        if not site_config.get('cache', {}).get('offline'):
+            self.rate_limiter = RateLimiter.from_config(site_config)
+    
+    @classmethod
+    def from_config(cls, site_config: Dict, fetch, write, **kwargs) -> 'ChapterPipeline':
+        """Build with queue/pool sizes from the site config's `pipeline` section"""
+        pipeline_config = site_config.get('pipeline', {})
+        kwargs.setdefault('parse_workers', pipeline_config.get('parse_workers', 1))
+        kwargs.setdefault('queue_size', pipeline_config.get('queue_size', 16))
+        kwargs.setdefault('retry_rounds', pipeline_config.get('retry_rounds', 2))
+        return cls(site_config, fetch, write, **kwargs)
+    
+    def _requeue_failed(self, todo: queue.Queue) -> bool:
+        """Move the retry queue into todo once todo has run dry; False if there is nothing to retry"""
+        with self._retry_lock:
+            if not self._retry_queue:
+                return False
+            print(f"Retrying {len(self._retry_queue)} failed fetch(es)")
+            for entry in self._retry_queue:
+                todo.put(entry)
+            self._retry_queue.clear()
+            return True
+    
+    def _fetch_worker(self, todo: queue.Queue, fetched: queue.Queue):
+        stats = self.stats['fetch']
+        with self.session_factory() as session:
+            while not self.stop_event.is_set():
+                try:
+                    item, attempt = todo.get_nowait()
+                except queue.Empty:
+                    if self._requeue_failed(todo):
+                        continue
+                    return
+                start = time.monotonic()
+                try:
+                    html = self.fetch(session, item)
+                    error = None if html else 'Failed to fetch HTML'
+                except Exception as e:
+                    html, error = None, str(e)
+                stats.record(time.monotonic() - start, ok=bool(html))
+                if error and attempt < self.retry_rounds:
+                    # Retried after the rest instead of hammering the site now
+                    with self._retry_lock:
+                        self._retry_queue.append((item, attempt + 1))
+                        self.retried += 1
+                    continue
+                # Failures travel down the queues so on_failure runs on the writer thread
+                fetched.put((item, html, ('fetch', error) if error else None))
+                self.stats['parse'].observe_queue(fetched.qsize())
+    
+    def _parse_dispatcher(self, fetched: queue.Queue, parsed: queue.Queue, fetchers_left: List[int]):
+        """Feed fetched pages to the pool, keeping at most queue_size in flight"""
+        stats = self.stats['parse']
+        executor = None
+        if self.parse_workers:
+            executor = parser_pool(self.site_config, self.parse_workers, spawn=True)
+        else:
+            _init_worker(self.site_config)
+        
+        in_flight = threading.Semaphore(self.queue_size)
+        
+        def finished(item: Dict, submitted: float, future: Future):
+            try:
+                result = future.result()
+            except Exception as e:
+                stats.record(time.monotonic() - submitted, ok=False)
+                parsed.put((item, None, ('parse', str(e))))
+            else:
+                stats.record(time.monotonic() - submitted)
+                parsed.put((item, result, None))
+                self.stats['write'].observe_queue(parsed.qsize())
+            finally:
+                in_flight.release()
+        
+        try:
+            while True:
+                entry = fetched.get()
+                if entry is _DONE:
+                    fetchers_left[0] -= 1
+                    if fetchers_left[0] == 0:
+                        break
+                    continue
+                item, html, failure = entry
+                if failure:
+                    parsed.put(entry)
+                    continue
+                in_flight.acquire()
+                submitted = time.monotonic()
+                if executor is None:
+                    future = Future()
+                    try:
+                        future.set_result(parse_chapter_html(html))
+                    except Exception as e:
+                        future.set_exception(e)
+                else:
+                    try:
+                        future = executor.submit(parse_chapter_html, html)
+                    except Exception as e:
+                        # e.g. BrokenProcessPool: fail the item instead of the whole run
+                        future = Future()
+                        future.set_exception(e)
+                future.add_done_callback(
+                    lambda f, item=item, submitted=submitted: finished(item, submitted, f)
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+            parsed.put(_DONE)
+    
+    def _writer(self, parsed: queue.Queue):
+        stats = self.stats['write']
+        while True:
+            entry = parsed.get()
+            if entry is _DONE:
+                return
+            item, result, failure = entry
+            if failure:
+                self.on_failure(item, *failure)
+                continue
+            if not result['content'] and self.rate_limiter is not None and item.get('url'):
+                # An empty page usually means the site is throttling
+                self.rate_limiter.backoff(item['url'], 'empty parse')
+            start = time.monotonic()
+            try:
+                self.write(item, result)
+            except Exception as e:
+                stats.record(time.monotonic() - start, ok=False)
+                self.on_failure(item, 'write', str(e))
+            else:
+                stats.record(time.monotonic() - start)
+    
+    def run(self, items: Iterable[Dict]) -> Dict[str, StageStats]:
+        """Push items through all stages and wait until every result is written"""
+        todo = queue.Queue()
+        for item in items:
+            todo.put((item, 0))
+        fetched = queue.Queue(maxsize=self.queue_size)
+        parsed = queue.Queue(maxsize=self.queue_size)
+        start = time.monotonic()
+        
+        def fetch_then_signal():
+            try:
+                self._fetch_worker(todo, fetched)
+            finally:
+                fetched.put(_DONE)
+        
+        fetchers = [
+            threading.Thread(target=fetch_then_signal, name=f'fetch-{i + 1}', daemon=True)
+            for i in range(self.fetch_workers)
+        ]
+        dispatcher = threading.Thread(
+            target=self._parse_dispatcher, args=(fetched, parsed, [len(fetchers)]),
+            name='parse-dispatch', daemon=True
+        )
+        writer = threading.Thread(target=self._writer, args=(parsed,), name='writer', daemon=True)
+        
+        for thread in [writer, dispatcher] + fetchers:
+            thread.start()
+        try:
+            # join with a timeout keeps the main thread responsive to Ctrl+C
+            while writer.is_alive():
+                writer.join(timeout=0.5)
+        except KeyboardInterrupt:
+            print("\nStopping: finishing chapters already fetched...")
+            self.stop_event.set()
+            writer.join()
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            print(f"Pipeline finished in {elapsed:.1f}s")
+            for stats in self.stats.values():
+                print(f"   {stats.summary(elapsed)}")
+            if self.retried:
+                print(f"   retry queue: {self.retried} failed fetch(es) retried after the rest")
+            if self.rate_limiter is not None and self.rate_limiter.requests:
+                print(f"   rate limit: {self.rate_limiter.summary(self.site_config.get('base_url', ''))}")
+        return self.stats
@@ -0,0 +1,215 @@
+import json
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# Longest Retry-After honoured; anything above is treated as this
+MAX_RETRY_AFTER = 900
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), None if absent or invalid"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(0.0, seconds), MAX_RETRY_AFTER)
+
+
+class RateLimiter:
+    """
+    Per-host token bucket shared by threads, fetch workers and concurrent runs
+    
+    A host earns its rate in tokens per second, up to burst. A request takes
+    one token (more for heavier pages) and only waits for the shortfall, so
+    time already spent on the previous request counts towards the spacing.
+    Slots are reserved under a lock and slept outside it, which spaces
+    concurrent callers without polling. With a state file the buckets live in
+    that file under an exclusive file lock, so separate processes (several
+    scripts, or pool workers) draw from the same buckets.
+    
+    When adaptive, each host's rate follows AIMD: success() adds `increase`
+    requests/min up to the maximum, backoff() multiplies the rate by
+    `decrease` down to the minimum and can hold the host for a Retry-After
+    delay. Long crawls settle just below the rate the site starts refusing.
+    """
+    
+    # from_config hands out one instance per settings within a process
+    _shared: Dict[Tuple, 'RateLimiter'] = {}
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, requests_per_minute: Optional[float], burst: float = 1,
+                 state_file: Optional[str] = None, adaptive: bool = False,
+                 min_requests_per_minute: float = None, max_requests_per_minute: float = None,
+                 increase: float = 0.5, decrease: float = 0.5):
+        self.rate = requests_per_minute / 60.0 if requests_per_minute else 0.0
+        self.burst = max(1.0, float(burst))
+        self.state_file = Path(state_file) if state_file and FCNTL_AVAILABLE else None
+        self.adaptive = adaptive and self.rate > 0
+        # The starting rate is always within the adaptive range
+        self.min_rate = min(self.rate, (min_requests_per_minute or 0) / 60.0 or self.rate)
+        self.max_rate = max(self.rate, (max_requests_per_minute or 0) / 60.0)
+        self.increase = increase / 60.0
+        self.decrease = min(max(decrease, 0.05), 1.0)
+        self.requests = 0
+        self.waited = 0.0
+        self.backoffs = 0
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[float]] = {}
+    
+    @classmethod
+    def from_config(cls, config: Dict) -> 'RateLimiter':
+        """Limiter for the site config's `rate_limit` section, shared within the process"""
+        rate_config = config.get('rate_limit', {})
+        rpm = rate_config.get('requests_per_minute', rate_config.get('max_requests_per_minute'))
+        if rpm is None and 'min' in rate_config and 'max' in rate_config:
+            # Older configs: one request per average delay
+            rpm = 120.0 / (rate_config['min'] + rate_config['max'])
+        state_file = rate_config.get('state_file')
+        settings = dict(
+            burst=rate_config.get('burst', 1),
+            state_file=state_file,
+            adaptive=rate_config.get('adaptive', False),
+            min_requests_per_minute=rate_config.get('min_requests_per_minute'),
+            max_requests_per_minute=rate_config.get('max_requests_per_minute'),
+            increase=rate_config.get('increase', 0.5),
+            decrease=rate_config.get('decrease', 0.5)
+        )
+        key = (rpm, str(Path(state_file).resolve()) if state_file else None) + tuple(
+            value for name, value in sorted(settings.items()) if name != 'state_file'
+        )
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(rpm, **settings)
+            return cls._shared[key]
+    
+    def _apply(self, buckets: Dict, host: str, change: Callable[[List[float]], Any], now: float) -> Any:
+        """Refill host's bucket [tokens, updated, rate] up to now, then let change() modify it"""
+        tokens, updated, rate = (list(buckets.get(host) or []) + [None] * 3)[:3]
+        if tokens is None or updated is None:
+            tokens, updated = self.burst, now
+        # Learned rates persist (also across runs); fixed ones follow the config
+        rate = min(max(rate, self.min_rate), self.max_rate) if self.adaptive and rate else self.rate
+        # A clock step backwards must not drain the bucket
+        bucket = [min(self.burst, tokens + max(0.0, now - updated) * rate), now, rate]
+        result = change(bucket)
+        buckets[host] = bucket
+        return result
+    
+    def _apply_shared(self, host: str, change: Callable[[List[float]], Any]) -> Any:
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_file, 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    buckets = json.loads(f.read() or '{}')
+                    if not isinstance(buckets, dict):
+                        buckets = {}
+                except ValueError:
+                    buckets = {}
+                result = self._apply(buckets, host, change, time.time())
+                f.seek(0)
+                f.truncate()
+                json.dump(buckets, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return result
+    
+    def _update(self, url: str, change: Callable[[List[float]], Any]) -> Any:
+        host = urlparse(url).netloc or url
+        with self._lock:
+            if self.state_file is not None:
+                try:
+                    return self._apply_shared(host, change)
+                except (OSError, TypeError) as e:
+                    print(f"Warning: Rate limit state {self.state_file} unusable, "
+                          f"limiting this process only: {e}")
+                    self.state_file = None
+            return self._apply(self._buckets, host, change, time.time())
+    
+    def reserve(self, url: str, cost: float = 1.0) -> float:
+        """Reserve the next request slot for url's host; returns the seconds to wait before using it"""
+        if self.rate <= 0:
+            return 0.0
+        
+        def take(bucket: List[float]) -> float:
+            bucket[0] -= cost
+            return max(0.0, -bucket[0] / bucket[2])
+        
+        wait = self._update(url, take)
+        with self._lock:
+            self.requests += 1
+            self.waited += wait
+        return wait
+    
+    def acquire(self, url: str, cost: float = 1.0) -> float:
+        """Block until a request to url's host may start; returns the seconds waited"""
+        wait = self.reserve(url, cost)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    def success(self, url: str):
+        """A response with real content: raise the host's rate additively"""
+        if not self.adaptive:
+            return
+        
+        def increase(bucket: List[float]) -> float:
+            bucket[2] = min(self.max_rate, bucket[2] + self.increase)
+            return bucket[2]
+        
+        self._update(url, increase)
+    
+    def backoff(self, url: str, reason: str, retry_after: float = None):
+        """
+        The site pushed back (403/429/503, challenge page, empty parse): cut
+        the host's rate multiplicatively and hold it for retry_after seconds
+        """
+        if self.rate <= 0:
+            return
+        
+        def decrease(bucket: List[float]) -> Tuple[float, float]:
+            previous = bucket[2]
+            if self.adaptive:
+                bucket[2] = max(self.min_rate, bucket[2] * self.decrease)
+            if retry_after:
+                # The next single-token request waits retry_after from now
+                bucket[0] = min(bucket[0], 1 - retry_after * bucket[2])
+            return previous, bucket[2]
+        
+        previous, rate = self._update(url, decrease)
+        with self._lock:
+            self.backoffs += 1
+        if rate != previous or retry_after:
+            print(f"   Throttling {urlparse(url).netloc or url} ({reason}): "
+                  f"{previous * 60:.1f} -> {rate * 60:.1f} requests/min"
+                  + (f", holding {retry_after:.0f}s (Retry-After)" if retry_after else ""))
+    
+    def current_rate(self, url: str) -> float:
+        """Current requests/min for url's host"""
+        if self.rate <= 0:
+            return 0.0
+        return self._update(url, lambda bucket: bucket[2]) * 60
+    
+    def summary(self, url: str = None) -> str:
+        if self.rate <= 0:
+            return 'unlimited'
+        rate = self.current_rate(url) if url else self.rate * 60
+        return (f"{rate:.1f} requests/min{' (adaptive)' if self.adaptive else ''}, burst {self.burst:g}: "
+                f"{self.requests} requests, {self.waited:.1f}s waited, {self.backoffs} backoffs")
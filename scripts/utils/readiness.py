@@ -0,0 +1,96 @@
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+try:
+    from selenium.webdriver.common.by import By
+    CSS_SELECTOR = By.CSS_SELECTOR
+except ImportError:
+    CSS_SELECTOR = 'css selector'
+
+
+CHALLENGE_TITLES = ('Just a moment', 'Attention Required', 'Checking your browser')
+CHALLENGE_SELECTOR = '#challenge-form, #challenge-running, #cf-challenge-running, #challenge-stage'
+
+Condition = Callable[[Any], bool]
+
+
+def challenge_cleared(driver: Any) -> bool:
+    """True once the Cloudflare interstitial is gone and the DOM is usable"""
+    title = driver.title or ''
+    if any(marker in title for marker in CHALLENGE_TITLES):
+        return False
+    if driver.execute_script('return document.readyState') not in ('interactive', 'complete'):
+        return False
+    return not driver.find_elements(CSS_SELECTOR, CHALLENGE_SELECTOR)
+
+
+def challenge_page(html: str) -> bool:
+    """True if fetched HTML is the Cloudflare interstitial instead of the page"""
+    head = html[:4096]
+    if any(f'<title>{marker}' in head for marker in CHALLENGE_TITLES):
+        return True
+    return any(f'id="{element[1:]}"' in html for element in CHALLENGE_SELECTOR.split(', '))
+
+
+def data_script_present(driver: Any) -> bool:
+    """True once the page has defined window.__DATA__"""
+    return bool(driver.execute_script("return typeof window.__DATA__ !== 'undefined'"))
+
+
+def element_present(selector: str) -> Condition:
+    """Condition: at least one element matches selector"""
+    def condition(driver: Any) -> bool:
+        return bool(driver.find_elements(CSS_SELECTOR, selector))
+    return condition
+
+
+def link_count_stable(selector: str = "a[href*='.html']", minimum: int = 5) -> Condition:
+    """Condition: more than minimum links match and the count is unchanged since the last poll"""
+    last = {'count': None}
+
+    def condition(driver: Any) -> bool:
+        count = len(driver.find_elements(CSS_SELECTOR, selector))
+        stable = count > minimum and count == last['count']
+        last['count'] = count
+        return stable
+    return condition
+
+
+class PageReadiness:
+    """Poll page conditions instead of sleeping for fixed intervals"""
+
+    def __init__(self, timeout: float = 30, poll_interval: float = 0.5):
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def wait_any(self, driver: Any, conditions: List[Tuple[str, Condition]],
+                 timeout: float = None) -> Optional[str]:
+        """
+        Wait until any condition holds
+        Returns the name of the condition that was met, or None on timeout
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        start = time.monotonic()
+        while True:
+            for name, condition in conditions:
+                try:
+                    met = condition(driver)
+                except Exception:
+                    # Page is mid-navigation; try again on the next poll
+                    met = False
+                if met:
+                    print(f"   ✓ {name} after {time.monotonic() - start:.1f}s")
+                    return name
+
+            if time.monotonic() - start >= timeout:
+                names = ', '.join(name for name, _ in conditions)
+                print(f"   ⚠ Timeout after {timeout:.0f}s waiting for: {names}")
+                return None
+
+            time.sleep(self.poll_interval)
+
+    def wait(self, driver: Any, name: str, condition: Condition, timeout: float = None) -> bool:
+        """Wait for a single condition, returns True if it was met"""
+        return self.wait_any(driver, [(name, condition)], timeout=timeout) is not None
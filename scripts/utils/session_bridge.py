@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+class SessionBridge:
+    """
+    Carry Cloudflare clearance from a Selenium solve into the cloudscraper session
+
+    cf_clearance is only honoured together with the User-Agent that solved the
+    challenge, so both are captured per host, reused until the cookie expires
+    and persisted so later runs can start warm.
+    """
+
+    CLEARANCE_COOKIE = 'cf_clearance'
+
+    def __init__(self, cookie_file: Optional[str] = None):
+        self.cookie_file = Path(cookie_file) if cookie_file else None
+        self._lock = threading.Lock()
+        self.clearances: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load persisted clearances, dropping expired ones"""
+        if not self.cookie_file or not self.cookie_file.exists():
+            return {}
+        try:
+            with open(self.cookie_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load session cookies: {e}")
+            return {}
+        return {host: entry for host, entry in data.items() if not self._is_expired(entry)}
+
+    def _save(self):
+        """Persist clearances atomically"""
+        if not self.cookie_file:
+            return
+        try:
+            self.cookie_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cookie_file.with_suffix(self.cookie_file.suffix + '.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.clearances, f, indent=2)
+            os.replace(tmp_file, self.cookie_file)
+        except Exception as e:
+            print(f"Warning: Could not save session cookies: {e}")
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).hostname or '').lower()
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        expires_at = entry.get('expires_at')
+        return expires_at is not None and expires_at <= time.time()
+
+    def capture(self, driver: Any, url: str) -> bool:
+        """Copy clearance cookies and User-Agent out of a driver that loaded url"""
+        try:
+            cookies: List[Dict] = driver.get_cookies()
+            user_agent = driver.execute_script('return navigator.userAgent')
+        except Exception:
+            return False
+
+        clearance = next((c for c in cookies if c.get('name') == self.CLEARANCE_COOKIE), None)
+        if not clearance or not user_agent:
+            return False
+
+        entry = {
+            'user_agent': user_agent,
+            'cookies': [
+                {
+                    'name': c['name'],
+                    'value': c['value'],
+                    'domain': c.get('domain'),
+                    'path': c.get('path', '/'),
+                }
+                for c in cookies if c.get('name') and c.get('value') is not None
+            ],
+            'expires_at': clearance.get('expiry'),
+        }
+
+        with self._lock:
+            self.clearances[self._host(url)] = entry
+            self._save()
+        print(f"   ✓ Captured Cloudflare clearance for {self._host(url)}")
+        return True
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return a still-valid clearance for url's host"""
+        host = self._host(url)
+        with self._lock:
+            entry = self.clearances.get(host)
+            if entry and self._is_expired(entry):
+                del self.clearances[host]
+                self._save()
+                return None
+        return entry
+
+    def apply(self, session: Any, url: str) -> Optional[str]:
+        """
+        Load the clearance cookies for url into a requests/cloudscraper session
+        Returns the User-Agent that must accompany them, or None if there is none
+        """
+        entry = self.get(url)
+        if not entry:
+            return None
+        for cookie in entry['cookies']:
+            session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain') or '', path=cookie.get('path') or '/'
+            )
+        return entry['user_agent']
+
+    def invalidate(self, url: str):
+        """Forget the clearance for url's host (it was rejected)"""
+        with self._lock:
+            if self.clearances.pop(self._host(url), None) is not None:
+                self._save()
@@ -0,0 +1,94 @@
+from typing import Dict, List, Tuple
+
+from .chapter_list import fetch_list_page
+from .cloudflare_bypass import CloudflareBypass
+from .parser import RanobesParser
+
+
+def find_new_chapters(cf: CloudflareBypass, parser: RanobesParser, site_config: Dict,
+                      book_id: str, known_links: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Find chapters published since known_links was collected
+
+    Walks list pages from the front until a page contains only known URLs,
+    then from the back the same way, so new entries are found whether the
+    site lists newest-first or oldest-first. Untouched middle pages are
+    never fetched.
+
+    Returns: (merged links in site order with dense order_index, new links)
+    Raises: RuntimeError if a list page cannot be fetched or parsed, since
+    an empty page would otherwise look like one holding only known chapters
+    """
+    base_url = site_config.get('base_url', 'https://ranobes.top')
+    first_page_tpl = site_config.get('chapters_url_first', 'https://ranobes.top/chapters/{book_id}/')
+    page_tpl = site_config.get('chapters_url', 'https://ranobes.top/chapters/{book_id}/page/{page}/')
+    data_mode = site_config.get('list_data_mode', True)
+
+    known_urls = {link['url'] for link in known_links if link.get('url')}
+
+    def page_url(page: int) -> str:
+        if page == 1:
+            return first_page_tpl.format(book_id=book_id)
+        return page_tpl.format(book_id=book_id, page=page)
+
+    def fetch(page: int) -> Tuple[str, List[Dict]]:
+        html, chapters, _ = fetch_list_page(cf, parser, page_url(page), base_url, data_mode=data_mode)
+        if not html:
+            raise RuntimeError(f"Failed to fetch chapter list page {page}")
+        if not chapters:
+            raise RuntimeError(f"No chapters found on chapter list page {page}")
+        return html, chapters
+
+    html, first_chapters = fetch(1)
+
+    total_pages = parser.detect_total_pages(html)
+    print(f"Site reports {total_pages} page(s); {len(known_urls)} chapters already known")
+
+    pages: Dict[int, List[Dict]] = {1: first_chapters}
+
+    # Walk forward from page 1 until a page is entirely known
+    page = 1
+    while any(ch['url'] not in known_urls for ch in pages[page]) and page < total_pages:
+        page += 1
+        pages[page] = fetch(page)[1]
+    front_end = page
+
+    # Walk backward from the last page the same way
+    page = total_pages
+    while page > front_end:
+        if page not in pages:
+            pages[page] = fetch(page)[1]
+        if not any(ch['url'] not in known_urls for ch in pages[page]):
+            break
+        page -= 1
+    back_start = max(page, front_end + 1)
+
+    front = [ch for p in range(1, front_end + 1) for ch in pages.get(p, [])]
+    back = [ch for p in range(back_start, total_pages + 1) for ch in pages.get(p, [])]
+
+    seen = set()
+    merged: List[Dict] = []
+    new_links: List[Dict] = []
+
+    def add(link: Dict, is_new: bool):
+        url = link.get('url')
+        if not url or url in seen:
+            return
+        seen.add(url)
+        item = {'url': url, 'title': link.get('title'), 'order_index': len(merged)}
+        merged.append(item)
+        if is_new:
+            new_links.append(item)
+
+    front_urls = {ch['url'] for ch in front}
+    back_urls = {ch['url'] for ch in back}
+    for ch in front:
+        add(ch, ch['url'] not in known_urls)
+    for link in sorted(known_links, key=lambda l: l.get('order_index', 0)):
+        if link.get('url') not in front_urls and link.get('url') not in back_urls:
+            add(link, False)
+    for ch in back:
+        add(ch, ch['url'] not in known_urls)
+
+    print(f"Checked {len(pages)} of {total_pages} list page(s): {len(new_links)} new chapter(s)")
+    return merged, new_links
@@ -0,0 +1,205 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class WorkQueue:
+    """
+    Durable URL queue on a SQLite file, shared by worker processes
+    
+    Items are enqueued once (by URL) and claimed in batches: claim() leases
+    pending items to this worker for lease_seconds. ack() marks an item done,
+    nack() puts it back with its attempt counted, or marks it failed after
+    max_attempts. A worker that dies keeps its leases only until they expire,
+    then the next claim() hands them to someone else, so several processes
+    (or machines sharing the file) can work one book without fetching a page
+    twice while its lease is live.
+    
+    The file uses a rollback journal rather than WAL, which needs shared
+    memory and does not work across machines on a network file system.
+    Every state change is one short BEGIN IMMEDIATE transaction; a busy
+    database is waited for, not failed on.
+    """
+    
+    def __init__(self, path: str, lease_seconds: float = 600, max_attempts: int = 3,
+                 owner: str = None, busy_timeout: float = 30):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = max(1.0, float(lease_seconds))
+        self.max_attempts = max(1, max_attempts)
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        
+        # Transactions are opened explicitly (isolation_level=None)
+        self.conn = sqlite3.connect(
+            self.path, timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute('PRAGMA journal_mode=DELETE')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS work (
+                url TEXT PRIMARY KEY,
+                order_index INTEGER,
+                payload TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                updated_at REAL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_work_status ON work(status, order_index)')
+    
+    @classmethod
+    def from_config(cls, path: str, config: Dict, **kwargs) -> 'WorkQueue':
+        """Queue at path with lease settings from the site config's `work_queue` section"""
+        queue_config = config.get('work_queue', {})
+        kwargs.setdefault('lease_seconds', queue_config.get('lease_seconds', 600))
+        kwargs.setdefault('max_attempts', queue_config.get('max_attempts', 3))
+        return cls(path, **kwargs)
+    
+    def _transaction(self, work):
+        """Run work(conn) in one write transaction (taken up front, so claims never race)"""
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = work(self.conn)
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            return result
+    
+    def enqueue(self, items: Iterable[Dict]) -> int:
+        """Add items (dicts with a 'url') not queued yet, returns the number added"""
+        now = time.time()
+        rows = []
+        for idx, item in enumerate(items):
+            if item.get('url'):
+                item = dict(item, order_index=item.get('order_index', idx))
+                rows.append((item['url'], item['order_index'], json.dumps(item, ensure_ascii=False), now))
+        
+        def insert(conn: sqlite3.Connection) -> int:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO work (url, order_index, payload, updated_at) VALUES (?, ?, ?, ?)',
+                rows
+            )
+            return conn.total_changes - before
+        
+        return self._transaction(insert)
+    
+    def requeue_expired(self) -> int:
+        """Return items whose lease ran out to the pending state"""
+        return self._transaction(lambda conn: self._requeue_expired(conn, time.time()))
+    
+    @staticmethod
+    def _requeue_expired(conn: sqlite3.Connection, now: float) -> int:
+        return conn.execute(
+            'UPDATE work SET status = ?, lease_owner = NULL, lease_expires = NULL, '
+            "last_error = 'lease expired', updated_at = ? WHERE status = ? AND lease_expires < ?",
+            (PENDING, now, LEASED, now)
+        ).rowcount
+    
+    def claim(self, limit: int) -> List[Dict]:
+        """Lease up to limit pending items (in reading order) to this worker"""
+        def lease(conn: sqlite3.Connection) -> List[Dict]:
+            now = time.time()
+            expired = self._requeue_expired(conn, now)
+            if expired:
+                print(f"   Work queue: {expired} expired lease(s) returned to the queue")
+            rows = conn.execute(
+                'SELECT url, payload FROM work WHERE status = ? ORDER BY order_index LIMIT ?',
+                (PENDING, max(1, limit))
+            ).fetchall()
+            conn.executemany(
+                'UPDATE work SET status = ?, lease_owner = ?, lease_expires = ?, '
+                'attempts = attempts + 1, updated_at = ? WHERE url = ?',
+                [(LEASED, self.owner, now + self.lease_seconds, now, url) for url, _ in rows]
+            )
+            return [json.loads(payload) for _, payload in rows]
+        
+        return self._transaction(lease)
+    
+    def renew(self) -> int:
+        """Extend every lease this worker holds by lease_seconds from now"""
+        now = time.time()
+        return self._transaction(lambda conn: conn.execute(
+            'UPDATE work SET lease_expires = ? WHERE status = ? AND lease_owner = ?',
+            (now + self.lease_seconds, LEASED, self.owner)
+        ).rowcount)
+    
+    def ack(self, urls: Iterable[str]) -> int:
+        """
+        Mark items done; the result is stored, so this holds even if the lease
+        expired and another worker has claimed the item since
+        """
+        now = time.time()
+        rows = [(DONE, now, url, DONE) for url in urls]
+        return self._transaction(lambda conn: conn.executemany(
+            'UPDATE work SET status = ?, lease_owner = NULL, lease_expires = NULL, '
+            'last_error = NULL, updated_at = ? WHERE url = ? AND status != ?',
+            rows
+        ).rowcount)
+    
+    def nack(self, url: str, error: str) -> Optional[str]:
+        """
+        Give a failed item back: pending for another attempt, or failed once
+        max_attempts are used up. Returns the new status, None if this worker
+        no longer holds the lease (someone else is on it)
+        """
+        def release(conn: sqlite3.Connection) -> Optional[str]:
+            row = conn.execute(
+                'SELECT attempts FROM work WHERE url = ? AND status = ? AND lease_owner = ?',
+                (url, LEASED, self.owner)
+            ).fetchone()
+            if row is None:
+                return None
+            status = FAILED if row[0] >= self.max_attempts else PENDING
+            conn.execute(
+                'UPDATE work SET status = ?, lease_owner = NULL, lease_expires = NULL, '
+                'last_error = ?, updated_at = ? WHERE url = ?',
+                (status, error, time.time(), url)
+            )
+            return status
+        
+        return self._transaction(release)
+    
+    def release(self) -> int:
+        """Hand back every lease this worker holds without counting the attempt (clean shutdown)"""
+        return self._transaction(lambda conn: conn.execute(
+            'UPDATE work SET status = ?, lease_owner = NULL, lease_expires = NULL, '
+            'attempts = MAX(0, attempts - 1), updated_at = ? WHERE status = ? AND lease_owner = ?',
+            (PENDING, time.time(), LEASED, self.owner)
+        ).rowcount)
+    
+    def requeue_failed(self) -> int:
+        """Give failed items a fresh set of attempts"""
+        return self._transaction(lambda conn: conn.execute(
+            'UPDATE work SET status = ?, attempts = 0, updated_at = ? WHERE status = ?',
+            (PENDING, time.time(), FAILED)
+        ).rowcount)
+    
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute('SELECT status, COUNT(*) FROM work GROUP BY status').fetchall()
+        counts = {status: 0 for status in (PENDING, LEASED, DONE, FAILED)}
+        counts.update(rows)
+        return counts
+    
+    def summary(self) -> str:
+        counts = self.counts()
+        return ', '.join(f"{count} {status}" for status, count in counts.items())
+    
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Read back and verify an exported chapters database.
+
+Decodes every chapter (zstd frames are checksummed, so corruption is caught),
+optionally compares each one with the chapters JSON it was exported from, and
+reports the compression ratio and per-chapter decode time.
+
+Usage:
+  python verify_db.py --db output/chapters_133485.db
+  python verify_db.py --db output/chapters_133485.db --source output/chapters_133485.json
+  python verify_db.py --db output/chapters_133485.db --dump 3
+
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.content_codec import CompressedContentReader, format_report
+
+
+def load_expected(source: Path) -> dict:
+    """url -> content from a chapters JSON file"""
+    with open(source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    chapters = data.get('chapters', []) if isinstance(data, dict) else data
+    return {ch['url']: ch.get('content', '') for ch in chapters if ch.get('url')}
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Verify an exported chapters database')
+    ap.add_argument('--db', required=True, help='SQLite file written by OutputFormatter.export_sqlite')
+    ap.add_argument('--book-id', help='Only check this book')
+    ap.add_argument('--source', help='Chapters JSON to compare decoded content against')
+    ap.add_argument('--dump', type=int, metavar='N', help='Print the first N decoded chapters')
+    args = ap.parse_args()
+
+    reader = CompressedContentReader(args.db)
+    try:
+        expected = load_expected(Path(args.source)) if args.source else None
+        result = reader.verify(book_id=args.book_id, expected=expected)
+
+        print(f"Checked {result['checked']} chapters in {args.db}")
+        for book_id, report in result['reports'].items():
+            print(f"  book {book_id}: {format_report(report)}")
+        if not result['reports']:
+            print("  content is stored uncompressed")
+
+        if args.dump:
+            for idx, chapter in enumerate(reader.chapters(book_id=args.book_id)):
+                if idx >= args.dump:
+                    break
+                print(f"\n[{chapter['order_index']}] {chapter['title']}")
+                print(chapter['content'][:500])
+
+        if result['errors']:
+            print(f"\n❌ {len(result['errors'])} problem(s):")
+            for error in result['errors'][:20]:
+                print(f"  {error}")
+            sys.exit(1)
+        print("✓ All chapters decoded" + (" and match the source" if expected is not None else ""))
+    finally:
+        reader.close()
+
+
+if __name__ == '__main__':
+    main()